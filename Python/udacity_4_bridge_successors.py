@@ -1,28 +1,35 @@
-def bridge_problem(here):
+from udacity_4_search import lowest_cost_search, path_to
+from udacity_4_frontier import PriorityFrontier
+
+def bridge_problem(here, stats=None):
     """
     State will be a (people-here, people-there, time-elapsed)
+    If stats is a SearchStats, record what the search did in it.
     """
     Fail = []
     here = frozenset(here) | frozenset(['light'])
-    explored = set() # set of states we have visited
-    frontier = [[(here, frozenset(), 0)]] # ordered list of paths we have blazed
-    if not here:
-        return frontier[0]
+    start = (here, frozenset(), 0)
+    came_from = {start: None} # states we have visited, and how we got there
+    frontier = PriorityFrontier() # states we have blazed, by time elapsed
+    successors = bsuccessors
+    if stats is not None:
+        successors, frontier = stats.instrument(successors, frontier, came_from)
+    frontier.add(start, 0, None)
     while frontier:
-        path = frontier.pop(0) 
-        here_last, _, _ = state_last = path[-1]
-        # check if the path with the least elapsed_time solves the problem
+        _, state_last, _ = frontier.pop() 
+        here_last, _, _ = state_last
+        # check if the state with the least elapsed_time solves the problem
         # other paths at this point would have the same number of steps
         if not here_last:
-            return path
-        for (state, action) in bsuccessors(state_last).items():
-            if state not in explored:
-                explored.add(state)
-                path2 = path + [action, state]
+            return path_to(came_from, state_last)
+        for (state, action) in successors(state_last).items():
+            if state not in came_from:
+                # keep a parent pointer, instead of a copy of the path
+                came_from[state] = (state_last, action)
                 # instead of returning the first result (i.e. if not here)
-                # append all results, and order them
-                frontier.append(path2)
-                frontier.sort(key=elapsed_time) 
+                # add all results, ordered by time elapsed 
+                # (ties: first added, first out; as with a sorted list)
+                frontier.add(state, state[2], None)
     return Fail
 
 def elapsed_time(path):
@@ -96,45 +103,15 @@ doctest.testmod()
 #------------------------------------------------------------------------------
 # faster!
 
-def bridge_problem2(here):
+# lowest_cost_search is the same search, with a heap-backed frontier
+# and parent pointers instead of a copy of the path for every successor
+def bridge_problem2(here, stats=None):
     """
-    State will be a (people-here, people-there, time-elapsed)
+    State will be a (people-here, people-there)
     """
     here = frozenset(here) | frozenset(['light'])
-    explored = set() # set of states we have visited
-    frontier = [[(here, frozenset())]] # ordered list of paths we have blazed
-    if not here:
-        return frontier[0]
-    while frontier:
-        path = frontier.pop(0) 
-        here_last, _ = state_last = path[-1]
-        if not here_last:
-            return path
-        # moved to out of the loop as add_to_frontier removes lots of paths
-        explored.add(state_last)
-        for (state, action) in bsuccessors2(state_last).items():
-            if state not in explored:
-                path2 = path + [(action, path_cost(path) + bcost(action)), state]
-                add_to_frontier(frontier, path2)
-    return Fail
-
-Fail = []
-
-def add_to_frontier(frontier, path):
-    """
-    Add path to frontier, replacing costlier path if there is one.
-    This could be done more efficiently...
-    """
-    old = None
-    for i, p in enumerate(frontier):
-        if p[-1] == path[-1]:
-            old = i
-            break
-    if old is not None and path_cost(frontier[old]) < path_cost(path):
-        return  # old path is better: do nothing
-    elif old is not None:
-        del frontier[old]
-    frontier.append(path)
+    return lowest_cost_search((here, frozenset()), bsuccessors2,
+                              lambda state: not state[0], bcost, stats)
 
 # better: leave time out of state (to be figured out in separate cost function)
 # so that recurrant (here, there) pair are considered as duplicate states
@@ -0,0 +1,129 @@
+#------------------------------------------------------------------------------
+# frontiers for search
+# used by:
+# udacity_4_search.py
+#
+# FIFOFrontier: breadth first search
+# LIFOFrontier: depth first search
+# PriorityFrontier: lowest cost first (uniform cost and A* search)
+
+import collections
+import heapq
+import itertools
+
+# list.pop(0) moves every remaining element: O(n) per pop, which makes
+# breadth first search quadratic in the size of the frontier.
+# a deque pops from either end in O(1).
+class FIFOFrontier(object):
+    """
+    A first-in, first-out queue of states.
+    """
+    def __init__(self, items=()):
+        self.queue = collections.deque(items)
+
+    def add(self, item):
+        self.queue.append(item)
+
+    def pop(self):
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
+
+class LIFOFrontier(object):
+    """
+    A last-in, first-out stack of states.
+    """
+    def __init__(self, items=()):
+        self.stack = list(items)
+
+    def add(self, item):
+        self.stack.append(item)
+
+    def pop(self):
+        return self.stack.pop()
+
+    def __len__(self):
+        return len(self.stack)
+
+# instead of re-sorting a list of paths and scanning it for duplicates
+# (O(n log n) + O(n) per insertion), keep a binary heap of entries plus
+# a {state: entry} index:
+# * add is O(log n): a cheaper path to a state just pushes a new entry
+# * the old entry stays in the heap, but is no longer in the index (lazy deletion)
+# * pop skips entries that are no longer in the index
+class PriorityFrontier(object):
+    """
+    A priority queue of (cost, state, item) entries, with at most one live
+    entry per state: the cheapest one seen so far. Among entries of equal cost,
+    the earliest added is popped first.
+    """
+    def __init__(self):
+        self.heap = []
+        self.index = {}  # {state: [cost, count, state, item]} for live entries
+        self.counter = itertools.count()
+
+    def add(self, state, cost, item):
+        """
+        Add item (e.g. the path to state) with the given cost, replacing the
+        entry for state if it is costlier. Return True if item was added.
+        """
+        old = self.index.get(state)
+        if old is not None and old[0] < cost:
+            return False  # old entry is better: do nothing
+        entry = [cost, next(self.counter), state, item]
+        self.index[state] = entry
+        heapq.heappush(self.heap, entry)
+        return True
+
+    def pop(self):
+        """
+        Remove and return the (cost, state, item) with the lowest cost.
+        """
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            cost, _, state, item = entry
+            if self.index.get(state) is entry:
+                del self.index[state]
+                return cost, state, item
+        raise IndexError("pop from an empty frontier")
+
+    def cost(self, state):
+        """
+        The cost of the live entry for state, or None.
+        """
+        entry = self.index.get(state)
+        return entry[0] if entry is not None else None
+
+    def __contains__(self, state):
+        return state in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+#------------------------------------------------------------------------------
+# test
+
+def test():
+    for (frontier, order) in [(FIFOFrontier, [1, 2, 3]), (LIFOFrontier, [3, 2, 1])]:
+        f = frontier([1, 2])
+        f.add(3)
+        assert len(f) == 3
+        assert [f.pop() for _ in range(len(f))] == order
+        assert not f
+    f = PriorityFrontier()
+    assert not f
+    assert f.add('a', 5, 'path to a')
+    assert f.add('b', 3, 'path to b')
+    assert f.add('a', 2, 'cheaper path to a')
+    assert not f.add('b', 4, 'costlier path to b')
+    assert len(f) == 2 and 'a' in f and f.cost('b') == 3
+    assert f.pop() == (2, 'a', 'cheaper path to a')
+    assert f.pop() == (3, 'b', 'path to b')
+    assert not f and 'a' not in f
+    # ties: earliest first; an equally good path replaces the old one
+    f.add('x', 1, 1); f.add('y', 1, 2); f.add('x', 1, 3)
+    assert [f.pop() for _ in range(len(f))] == [(1, 'y', 2), (1, 'x', 3)]
+    return 'tests pass'
+
+test()
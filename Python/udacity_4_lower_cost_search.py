@@ -2,31 +2,9 @@
 # generalizes 
 # udacity_4_bridge_successors.py
 
-def lowest_cost_search(start, successors, is_goal, action_cost):
-    """
-    Return the lowest cost path, starting from start state, and considering 
-    successors(state) => {state:action,...}, that ends in a state 
-    for which is_goal(state) is true, where the cost of a path is 
-    the sum of action costs, which are given by action_cost(action).
-    """
-    Fail = []
-    if is_goal(start):
-        return [start]
-    explored = set() # set of states we have visited
-    frontier = [ [start] ] # ordered list of paths we have blazed
-    while frontier:
-        path = frontier.pop(0)
-        state1 = path[-1]
-        if is_goal(state1):
-        	return path
-        explored.add(state1)
-        pcost = path_cost(path)
-        for (state, action) in successors(state1).items():
-            if state not in explored:
-                total_cost = pcost + action_cost(action)
-                path2 = path + [(action, total_cost), state]
-                add_to_frontier(frontier, path2)
-    return Fail
+# better: keep parent pointers and rebuild the path once at the goal,
+# instead of copying path + [(action, cost), state] for every successor
+from udacity_4_search import lowest_cost_search, astar_search
 
 def path_cost(path):
     """
@@ -38,25 +16,6 @@ def path_cost(path):
         action, total_cost = path[-2]
         return total_cost
 
-def add_to_frontier(frontier, path):
-    """
-    Add path to frontier, replacing costlier path if there is one.
-    """
-    # (This could be done more efficiently.)
-    # Find if there is an old path to the final state of this path.
-    old = None
-    for i,p in enumerate(frontier):
-        if p[-1] == path[-1]:
-            old = i
-            break
-    if old is not None and path_cost(frontier[old]) < path_cost(path):
-        return # Old path was better; do nothing
-    elif old is not None:
-        del frontier[old] # Old path was worse; delete it
-    ## Now add the new path and re-sort
-    frontier.append(path)
-    frontier.sort(key=path_cost)
-
 #------------------------------------------------------------------------------
 # test: 
 
@@ -156,3 +115,42 @@ def bcost(action):
     return max(s)
 
 bridge_problem4([1, 2, 5, 10])
+
+#------------------------------------------------------------------------------
+# A*: like lowest_cost_search, but order the frontier by the cost so far
+# plus heuristic(state), an estimate of the cost still to go. If the estimate
+# never overestimates (admissible) and never drops by more than the cost of an
+# action (consistent), the first goal popped is still the cheapest.
+# astar_search is in udacity_4_search.py
+
+# half the slowest crossing would do, but the slowest person still here
+# has to cross at least once, so the whole crossing time is still admissible
+def bridge_heuristic(state):
+    """
+    A lower bound on the time left in the bridge problem. Works for both
+    (here, there) and (here, there, light) states.
+    """
+    here = state[0]
+    return max([p for p in here if p != 'light'], default=0)
+
+def bridge_problem5(here, stats=None):
+    """
+    Find the fastest (least elapsed time) path to the goal in the bridge problem.
+    """
+    start = (frozenset(here) | frozenset(['light']), frozenset())
+    def all_gone(state): 
+        return not (state[0] - frozenset(['light']))
+    return astar_search(start, bsuccessors2, all_gone, 
+                        lambda action: max(action[:2]), bridge_heuristic, stats)
+
+def test_astar():
+    assert path_cost(bridge_problem5([1, 2, 5, 10])) == 17
+    assert [path_cost(bridge_problem5([1, 2, 4, 8, 16][:N])) 
+            for N in range(1, 6)] == [1, 2, 7, 15, 28]
+    assert [path_cost(bridge_problem5([1, 1, 2, 3, 5, 8, 13, 21][:N])) 
+            for N in range(1, 8)] == [1, 1, 2, 6, 12, 19, 30]
+    assert bridge_heuristic((frozenset([1, 10, 'light']), frozenset([2]))) == 10
+    assert bridge_heuristic((frozenset(), frozenset([1, 2, 'light']), 1)) == 0
+    return 'test_astar passes'
+
+test_astar()
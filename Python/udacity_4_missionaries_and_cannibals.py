@@ -1,3 +1,5 @@
+from udacity_4_search import shortest_path_search
+
 def mc_problem(start=(3, 3, 1, 0, 0, 0), goal=None):
     """
     Solve the missionaries and cannibals problem.
@@ -5,25 +7,10 @@ def mc_problem(start=(3, 3, 1, 0, 0, 0), goal=None):
     Find a path that goes from the initial state to the goal state (which, if
     not specified, is the state with no people or boats on the start size)
     """
-    Fail = []
     if goal is None:
         goal = (0, 0, 0) + start[:3]
-    if start == goal:
-        return [start]
-    explored = set()
-    frontier = [[start]]
-    while frontier:
-        path = frontier.pop(0)
-        s = path[-1]
-        for (state, action) in csuccessors(s).items():
-            if state not in explored:
-                explored.add(state)
-                path2 = path + [action, state]
-                if state == goal:
-                    return path2
-                else:
-                    frontier.append(path2)
-    return Fail
+    # the search core keeps parent pointers instead of a path per frontier entry
+    return shortest_path_search(start, csuccessors, lambda state: state == goal)
 
 def csuccessors(state):
     """
@@ -0,0 +1,481 @@
+#------------------------------------------------------------------------------
+# search core
+# generalizes
+# udacity_4_shortest_path_search.py
+# udacity_4_lower_cost_search.py
+#
+# instead of building path2 = path + [action, state] for every successor
+# (copying the whole path each time: quadratic in the solution depth),
+# keep came_from = {state: (parent, step)} and rebuild the path once,
+# at the goal. Paths are still [state, action, state, ...] lists.
+
+from udacity_4_frontier import FIFOFrontier, LIFOFrontier, PriorityFrontier
+
+def shortest_path_search(start, successors, is_goal, frontier=None, stats=None):
+    """
+    Find the shortest path from start state to a state
+    such that is_goal(state) is true.
+    """
+    if frontier is None:
+        frontier = FIFOFrontier()
+    return graph_search(start, successors, is_goal, frontier, stats)
+
+def depth_first_search(start, successors, is_goal):
+    """
+    Find a path (not necessarily the shortest) from start state to a state
+    such that is_goal(state) is true, going as deep as possible first.
+    """
+    return graph_search(start, successors, is_goal, LIFOFrontier())
+
+def graph_search(start, successors, is_goal, frontier, stats=None):
+    """
+    Search from start state for a state such that is_goal(state) is true,
+    taking the next state to expand from frontier (a FIFOFrontier or LIFOFrontier).
+    If stats is a SearchStats, record what the search did in it.
+    """
+    Fail = []
+    if is_goal(start):
+        return [start]
+    came_from = {start: None} # states we have visited, and how we got there
+    if stats is not None:
+        successors, frontier = stats.instrument(successors, frontier, came_from)
+    frontier.add(start) # states we have blazed
+    while frontier:
+        state1 = frontier.pop()
+        for (state, action) in successors(state1).items():
+            if state not in came_from:
+                came_from[state] = (state1, action)
+                if is_goal(state):
+                    return path_to(came_from, state)
+                frontier.add(state)
+    return Fail
+
+def lowest_cost_search(start, successors, is_goal, action_cost, stats=None):
+    """
+    Return the lowest cost path, starting from start state, and considering
+    successors(state) => {state:action,...}, that ends in a state
+    for which is_goal(state) is true, where the cost of a path is
+    the sum of action costs, which are given by action_cost(action).
+    A path is [state, (action, total_cost), state, ...].
+    """
+    return astar_search(start, successors, is_goal, action_cost, lambda state: 0, stats)
+
+def astar_search(start, successors, is_goal, action_cost, heuristic, stats=None):
+    """
+    Return the lowest cost path, like lowest_cost_search, but explore
+    states in order of path cost + heuristic(state).
+    """
+    Fail = []
+    if is_goal(start):
+        return [start]
+    came_from = {start: None} # best known way to reach each state
+    explored = set() # set of states we have expanded
+    frontier = PriorityFrontier() # cheapest cost we have blazed to each state
+    if stats is not None:
+        successors, frontier = stats.instrument(successors, frontier, came_from)
+    frontier.add(start, heuristic(start), 0)
+    while frontier:
+        _, state1, pcost = frontier.pop()
+        if is_goal(state1):
+            return path_to(came_from, state1)
+        explored.add(state1)
+        for (state, action) in successors(state1).items():
+            if state not in explored:
+                total_cost = pcost + action_cost(action)
+                if frontier.add(state, total_cost + heuristic(state), total_cost):
+                    came_from[state] = (state1, (action, total_cost))
+    return Fail
+
+# grow a frontier from each end, one whole layer at a time (always the
+# smaller one), until they meet: for branching factor b and solution depth d
+# that explores about 2*b**(d/2) states instead of b**d
+def bidirectional_search(start, successors, goal, predecessors=None):
+    """
+    Find the shortest path from start state to goal, where goal is a state,
+    or a function returning an iterable of goal states.
+    predecessors(state) => {previous_state:action,...}, where action leads
+    from previous_state to state. It defaults to successors, for symmetric
+    problems where every action can be undone by an action with the same name.
+    """
+    Fail = []
+    if predecessors is None:
+        predecessors = successors
+    goals = list(goal()) if callable(goal) else [goal]
+    if start in goals:
+        return [start]
+    came_from = {start: None} # forward: {state: (parent, action)}
+    leads_to = dict.fromkeys(goals) # backward: {state: (child, action)}
+    forward, backward = [start], goals # the two frontiers
+    while forward and backward:
+        # a whole layer of the smaller frontier
+        if len(forward) <= len(backward):
+            forward, meets = expand_layer(forward, successors, came_from, leads_to)
+        else:
+            backward, meets = expand_layer(backward, predecessors, leads_to, came_from)
+        if meets:
+            # meeting states are all the same depth on the side just expanded,
+            # but not necessarily on the other side
+            meet = min(meets, key=lambda state: 
+                       len(path_to(came_from, state)) + len(path_to(leads_to, state)))
+            path = path_to(came_from, meet)
+            while leads_to[meet] is not None:
+                meet, action = leads_to[meet]
+                path += [action, meet]
+            return path
+    return Fail
+
+def expand_layer(frontier, successors, came_from, other):
+    """
+    Expand every state in frontier, recording parent pointers in came_from.
+    Return the next layer, and the new states that are already in other.
+    """
+    layer, meets = [], []
+    for state1 in frontier:
+        for (state, action) in successors(state1).items():
+            if state not in came_from:
+                came_from[state] = (state1, action)
+                layer.append(state)
+                if state in other:
+                    meets.append(state)
+    return layer, meets
+
+# parallel: successors functions are pure, so the states of one layer of a
+# breadth first search can be expanded in any order, by any process.
+# expand each layer in shards across a pool, then merge the results in
+# layer order here (checking came_from and is_goal), so that we find the
+# same path as shortest_path_search.
+# most successors are states seen before (pouring back, emptying a glass
+# that was just filled), and sending them all back to be merged here, one
+# at a time, costs more than finding them. so each worker drops some first:
+# * a state found twice in its shard is sent back once, with its first parent
+# * a state in the shard itself is not sent back at all
+# * a parent is sent back as its index in the layer, not as a state
+# the first parent of each state, in layer order, is the same as before, so
+# the merge here keeps the same states. (a snapshot of the states seen so
+# far would drop more, but it would have to be sent to every worker, on
+# every layer: the more workers, the more it costs.)
+#
+# a process pool pickles successors by name, and each worker process
+# imports its module to find it. a module that runs its tests when it is
+# imported, and starts a process pool in them, is still being imported:
+# the worker waits for that import to finish, and the test waits for the
+# worker, forever. so the modules that use this put their parallel tests
+# in a test_parallel(executor), run it with a ThreadPoolExecutor at import,
+# and with a ProcessPoolExecutor only when run as a script.
+
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+def parallel_shortest_path_search(start, successors, is_goal, workers=None, 
+                                  executor=None, min_layer=256):
+    """
+    Find the same shortest path as shortest_path_search, expanding each layer
+    of the search in parallel across executor (by default, a pool of workers
+    processes). successors must be picklable: a module-level function, a
+    functools.partial of one, or a method of a picklable object.
+    Layers smaller than min_layer are expanded in this process.
+    """
+    if executor is None:
+        with ProcessPoolExecutor(workers) as executor:
+            return parallel_shortest_path_search(start, successors, is_goal, 
+                                                 workers, executor, min_layer)
+    Fail = []
+    if is_goal(start):
+        return [start]
+    came_from = {start: None} # states we have visited, and how we got there
+    workers = workers or os.cpu_count() or 1
+    layer = [start]
+    while layer:
+        if len(layer) < min_layer:
+            found = expand_shard(successors, layer, 0)
+        else:
+            size = -(-len(layer) // workers) # one shard per worker
+            found = itertools.chain.from_iterable(executor.map(
+                expand_shard, itertools.repeat(successors), 
+                [layer[i:i+size] for i in range(0, len(layer), size)],
+                range(0, len(layer), size)))
+        next_layer = []
+        for (state, i, action) in found:
+            if state not in came_from:
+                came_from[state] = (layer[i], action)
+                if is_goal(state):
+                    return path_to(came_from, state)
+                next_layer.append(state)
+        layer = next_layer
+    return Fail
+
+def expand_shard(successors, states, offset):
+    """
+    The successors of states, other than states themselves, each once, as a
+    list of (state, i, action): layer[i] (states[i - offset]) reaches state first.
+    """
+    seen, found = set(states), {}
+    for (i, state1) in enumerate(states, offset):
+        for (state, action) in successors(state1).items():
+            if state not in seen and state not in found:
+                found[state] = (i, action)
+    return [(state, i, action) for (state, (i, action)) in found.items()]
+
+# memory-bounded: breadth first search keeps every state it has seen.
+# iterative deepening does a depth first search with a limit on the path cost,
+# raising the limit until a goal is found, so it only keeps the current path
+# (plus, optionally, a transposition table of at most table_size states). 
+# Re-expanding the shallow states on every iteration costs about b/(b-1) times 
+# as much as one search to the final depth, for branching factor b.
+
+def iterative_deepening_search(start, successors, is_goal, table_size=0):
+    """
+    Find the shortest path from start state to a state such that 
+    is_goal(state) is true, with memory proportional to its length.
+    """
+    path = ida_star_search(start, successors, is_goal, lambda action: 1, 
+                           lambda state: 0, table_size)
+    return [x if i % 2 == 0 else x[0] for (i, x) in enumerate(path)]
+
+def ida_star_search(start, successors, is_goal, action_cost, heuristic, table_size=0):
+    """
+    Return the lowest cost path, like astar_search, with memory
+    proportional to its length. A path is [state, (action, total_cost), state, ...].
+    """
+    Fail = []
+    if is_goal(start):
+        return [start]
+    bound = heuristic(start)
+    while bound < float('inf'):
+        table = {} if table_size else None
+        path, bound = bounded_search(start, successors, is_goal, action_cost, 
+                                     heuristic, bound, table, table_size)
+        if path:
+            return path
+    return Fail
+
+def bounded_search(start, successors, is_goal, action_cost, heuristic, 
+                   bound, table=None, table_size=0):
+    """
+    Depth first search from start for a goal, skipping states on the current
+    path, and pruning states where path cost + heuristic(state) > bound.
+    table (if not None) = {state: lowest path cost seen}, of at most table_size.
+    Return (path, bound), or (None, the lowest cost + heuristic that was pruned).
+    """
+    path = [start] # [state, (action, total_cost), state, ...]
+    on_path = {start}
+    pruned = float('inf')
+    stack = [iter(successors(start).items())] # what's left to try at each depth
+    while stack:
+        pcost = path_cost(path)
+        for (state, action) in stack[-1]:
+            if state in on_path:
+                continue
+            total_cost = pcost + action_cost(action)
+            f = total_cost + heuristic(state)
+            if f > bound:
+                pruned = min(pruned, f)
+                continue
+            if table is not None:
+                if table.get(state, float('inf')) <= total_cost:
+                    continue # been here, at least as cheaply
+                if state not in table and len(table) >= table_size:
+                    del table[next(iter(table))] # evict the oldest
+                table[state] = total_cost
+            path += [(action, total_cost), state]
+            if is_goal(state):
+                return path, bound
+            on_path.add(state)
+            stack.append(iter(successors(state).items()))
+            break
+        else: # nothing left to try here: back up
+            stack.pop()
+            on_path.discard(path.pop())
+            if path:
+                path.pop()
+    return None, pruned
+
+#------------------------------------------------------------------------------
+# instrumentation: like instrument_fn and c() in udacity_2_zebra.py, but for
+# any search that takes stats. Only the successors function and the frontier
+# are wrapped, and only when stats is given: no cost when it is not.
+
+import time
+
+class SearchStats(object):
+    """
+    Counts and timings for a search, filled in when passed as stats=SearchStats().
+    """
+    def __init__(self):
+        self.expanded = 0 # states whose successors were generated
+        self.generated = 0 # successors generated, including ones seen before
+        self.peak_frontier = 0
+        self.successors_time = 0.0 # seconds spent in successors
+        self.frontier_time = 0.0 # seconds spent adding to and popping the frontier
+        self.came_from = {} # the search's came_from: it only grows
+
+    @property
+    def reached(self):
+        "The number of states reached: expanded, or still on the frontier."
+        return len(self.came_from)
+
+    @property
+    def duplicates(self):
+        "Successors generated that had been reached before."
+        return self.generated - max(len(self.came_from) - 1, 0)
+
+    def instrument(self, successors, frontier, came_from):
+        """
+        Keep came_from, and return counting, timing versions of successors and frontier.
+        """
+        self.came_from = came_from
+        def counted_successors(state):
+            t0 = time.perf_counter()
+            result = successors(state)
+            self.successors_time += time.perf_counter() - t0
+            self.expanded += 1
+            self.generated += len(result)
+            return result
+        return counted_successors, CountingFrontier(frontier, self)
+
+    def __repr__(self):
+        return ("SearchStats(expanded=%d, generated=%d, duplicates=%d, "
+                "peak_frontier=%d, reached=%d, successors_time=%.4f, "
+                "frontier_time=%.4f)" % (
+                self.expanded, self.generated, self.duplicates, self.peak_frontier, 
+                self.reached, self.successors_time, self.frontier_time))
+
+class CountingFrontier(object):
+    """
+    A frontier that passes add and pop on to another frontier, 
+    recording counts and timings in stats.
+    """
+    def __init__(self, frontier, stats):
+        self.frontier = frontier
+        self.stats = stats
+
+    def add(self, *args):
+        t0 = time.perf_counter()
+        result = self.frontier.add(*args)
+        self.stats.frontier_time += time.perf_counter() - t0
+        self.stats.peak_frontier = max(self.stats.peak_frontier, len(self.frontier))
+        return result
+
+    def pop(self):
+        t0 = time.perf_counter()
+        result = self.frontier.pop()
+        self.stats.frontier_time += time.perf_counter() - t0
+        return result
+
+    def __len__(self):
+        return len(self.frontier)
+
+def instrument_search(search, *args):
+    "Call search(*args, stats=...), and print what it did."
+    stats = SearchStats()
+    path = search(*args, stats=stats)
+    print("{0} got a path of {1:d} actions with {2}".format(
+        search.__name__, len(path)//2, stats))
+    return path
+
+#------------------------------------------------------------------------------
+# paths
+
+def path_to(came_from, state):
+    """
+    Rebuild the [start, step, ..., state] path by following parent pointers,
+    where came_from = {state: (parent, step)} and came_from[start] is None.
+    """
+    path = [state]
+    while came_from[state] is not None:
+        state, step = came_from[state]
+        path += [step, state]
+    path.reverse()
+    return path
+
+def path_states(path):
+    "Return a list of states in this path."
+    return path[0::2]
+
+def path_actions(path):
+    "Return a list of actions in this path."
+    return path[1::2]
+
+def path_cost(path):
+    """
+    The total cost of a path, which is stored in a tuple with the final action.
+    """
+    if len(path) < 3:
+        return 0
+    else:
+        action, total_cost = path[-2]
+        return total_cost
+
+#------------------------------------------------------------------------------
+# test
+
+def test():
+    # a line of integers: step by 1 or jump by 3 (cost 5)
+    def successors(n):
+        return {n+1: '+1', n-1: '-1', n+3: '+3'}
+    def cost(action):
+        return 5 if action == '+3' else 1
+    assert shortest_path_search(0, successors, lambda n: n == 0) == [0]
+    assert shortest_path_search(0, successors, lambda n: n == 7) == [
+        0, '+1', 1, '+3', 4, '+3', 7]
+    assert path_states(shortest_path_search(0, successors, lambda n: n == -2)) == [
+        0, -1, -2]
+    assert lowest_cost_search(0, successors, lambda n: n == 4, cost) == [
+        0, ('+1', 1), 1, ('+1', 2), 2, ('+1', 3), 3, ('+1', 4), 4]
+    assert path_cost(lowest_cost_search(0, successors, lambda n: n == 12, cost)) == 12
+    assert path_cost(astar_search(0, successors, lambda n: n == 12, cost,
+                                  lambda n: abs(12-n))) == 12
+    # no way to reach the goal: fail
+    assert shortest_path_search(0, lambda n: {min(n+1, 5): '+1'}, lambda n: n == 6) == []
+    path = depth_first_search(0, successors, lambda n: n == 7)
+    assert path[0] == 0 and path[-1] == 7
+    assert all(successors(path[i])[path[i+2]] == path[i+1] 
+               for i in range(0, len(path)-2, 2))
+    # iterative deepening: same length as breadth first, same cost as A*
+    for goal in (0, 7, -2, 11):
+        path = iterative_deepening_search(0, successors, lambda n: n == goal)
+        assert len(path) == len(shortest_path_search(0, successors, lambda n: n == goal))
+        assert path == iterative_deepening_search(0, successors, lambda n: n == goal, 5)
+    assert path_cost(ida_star_search(0, successors, lambda n: n == 12, cost,
+                                     lambda n: abs(12-n))) == 12
+    assert path_cost(ida_star_search(0, successors, lambda n: n == 12, cost,
+                                     lambda n: 0, table_size=100)) == 12
+    assert iterative_deepening_search(0, lambda n: {min(n+1, 5): '+1'}, lambda n: n == 6) == []
+    # parallel: same path as breadth first (threads: these successors are
+    # local functions, which can't be pickled)
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(2) as executor:
+        for goal in (0, 7, -2, 11, 20):
+            assert parallel_shortest_path_search(
+                0, successors, lambda n: n == goal, 2, executor, min_layer=2) == (
+                shortest_path_search(0, successors, lambda n: n == goal))
+        assert parallel_shortest_path_search(0, lambda n: {min(n+1, 5): '+1'}, 
+                                             lambda n: n == 6, 2, executor) == []
+    # stats: the same path, and counts that add up
+    stats = SearchStats()
+    assert shortest_path_search(0, successors, lambda n: n == 7, stats=stats) == (
+        shortest_path_search(0, successors, lambda n: n == 7))
+    assert stats.generated == 3 * stats.expanded
+    stats = SearchStats()
+    shortest_path_search(0, lambda n: {n+1: '+1', n: '0'}, lambda n: n == 3, stats=stats)
+    assert (stats.expanded, stats.generated, stats.duplicates) == (3, 6, 3)
+    assert (stats.peak_frontier, stats.reached) == (1, 4)
+    stats = SearchStats()
+    assert path_cost(lowest_cost_search(0, successors, lambda n: n == 4, cost, stats)) == 4
+    assert stats.expanded > 0 and stats.peak_frontier >= 1 and stats.frontier_time > 0
+    # bidirectional: same length as breadth first; predecessors undo successors
+    def predecessors(n):
+        return {n-1: '+1', n+1: '-1', n-3: '+3'}
+    for goal in (0, 7, -2, 11, 20):
+        path = bidirectional_search(0, successors, goal, predecessors)
+        assert path[0] == 0 and path[-1] == goal
+        assert len(path) == len(shortest_path_search(0, successors, lambda n: n == goal))
+        assert all(successors(path[i])[path[i+2]] == path[i+1] 
+                   for i in range(0, len(path)-2, 2))
+    assert len(bidirectional_search(0, successors, lambda: [9, 10], predecessors)) == 7
+    assert bidirectional_search(0, lambda n: {min(n+1, 5): '+1'}, 6, 
+                                lambda n: {n-1: '+1'} if n <= 5 else {}) == []
+    return 'tests pass'
+
+test()
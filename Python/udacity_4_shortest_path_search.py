@@ -3,27 +3,9 @@
 # udacity_4_missionaries_and_cannibals.py
 # udacity_4_water_pouring.py
 
-def shortest_path_search(start, successors, is_goal):
-    """
-    Find the shortest path from start state to a state 
-    such that is_goal(state) is true.
-    """
-    Fail = []
-    if is_goal(start):
-        return [start]
-    explored = set() # set of states we have visited
-    frontier = [ [start] ] # ordered list of paths we have blazed
-    while frontier:
-        path = frontier.pop(0)
-        for (state, action) in successors(path[-1]).items():
-            if state not in explored:
-                explored.add(state)
-                path2 = path + [action, state]
-                if is_goal(state):
-                    return path2
-                else:
-                    frontier.append(path2)
-    return Fail
+# better: keep parent pointers and rebuild the path once at the goal,
+# instead of copying path + [action, state] for every successor
+from udacity_4_search import shortest_path_search
 
 #------------------------------------------------------------------------------
 # test: 
@@ -61,7 +43,9 @@ mc_problem2(start=(3, 3, 1, 0, 0, 0), goal=None)
 #------------------------------------------------------------------------------
 # test: 
 
-def more_pour_problem(capacities, goal, start=None):
+import functools
+
+def more_pour_problem(capacities, goal, start=None, frontier=None):
     """
     The first argument is a tuple of capacities (numbers) of glasses; the
     goal is a number which we must achieve in some glass. Start is a tuple
@@ -70,35 +54,40 @@ def more_pour_problem(capacities, goal, start=None):
     Keep track of frontier and previously explored; fail when no frontier.
     On success return a path: a [state, action, state2, ...] list, where an
     action is one of ('fill', i), ('empty', i), ('pour', i, j), where
-    i and j are indices indicating the glass number.
+    i and j are indices indicating the glass number. frontier is passed
+    on to shortest_path_search.
     """
     if start is None:
         start = (0,)*len(capacities)
 
-    def replace(state, i, val):
-        s = list(state)
-        s[i] = val
-        return type(state)(s)
-
-    # instead of dict comprehension with tuples (too complicated)
-    # use loop and lists, converting them back to tuples
-    def successors(state):
-        indices = range(len(state))
-        succ = {}
-        for i in indices:
-            succ[replace(state, i, capacities[i])] = ("fill", i)
-            succ[replace(state, i, 0)] = ("empty", i)
-            for j in indices:
-                if i != j:
-                    delta = min(state[i], capacities[j] - state[j])
-                    state_i = replace(state, i, state[i] - delta)
-                    succ[replace(state_i, j, state[j] + delta)] = ("pour", i, j)
-        return succ
+    # successors is a partial of a module-level function, rather than a
+    # closure, so that it can be pickled (parallel_shortest_path_search)
+    successors = functools.partial(pour_successors, capacities)
 
     def is_goal(state): 
         return goal in state
 
-    return shortest_path_search(start, successors, is_goal)
+    return shortest_path_search(start, successors, is_goal, frontier)
+
+def replace(state, i, val):
+    s = list(state)
+    s[i] = val
+    return type(state)(s)
+
+# instead of dict comprehension with tuples (too complicated)
+# use loop and lists, converting them back to tuples
+def pour_successors(capacities, state):
+    indices = range(len(state))
+    succ = {}
+    for i in indices:
+        succ[replace(state, i, capacities[i])] = ("fill", i)
+        succ[replace(state, i, 0)] = ("empty", i)
+        for j in indices:
+            if i != j:
+                delta = min(state[i], capacities[j] - state[j])
+                state_i = replace(state, i, state[i] - delta)
+                succ[replace(state_i, j, state[j] + delta)] = ("pour", i, j)
+    return succ
 
 def test_more_pour():
     assert more_pour_problem((1, 2, 4, 8), 4) == [
@@ -187,13 +176,186 @@ def test_ride():
     assert ride('newton', 'alewife') == [
         'newton', 'green', 'kenmore', 'green', 'copley', 'green', 'park', 'red', 'charles', 'red',
         'mit', 'red', 'central', 'red', 'harvard', 'red', 'porter', 'red', 'davis', 'red', 'alewife']
-    assert (path_states(longest_ride(boston)) == [
-        'wonderland', 'revere', 'suffolk', 'airport', 'maverick', 'aquarium', 'state', 'downtown', 'park',
-        'charles', 'mit', 'central', 'harvard', 'porter', 'davis', 'alewife'] or 
-        path_states(longest_ride(boston)) == [
-                'alewife', 'davis', 'porter', 'harvard', 'central', 'mit', 'charles', 
-                'park', 'downtown', 'state', 'aquarium', 'maverick', 'airport', 'suffolk', 'revere', 'wonderland'])
+    # state to park is 2 stops either way: via downtown or via government
+    longest = path_states(longest_ride(boston))
+    assert any(longest in (stops, stops[::-1]) for stops in [
+        ['wonderland', 'revere', 'suffolk', 'airport', 'maverick', 'aquarium', 'state', via, 'park',
+         'charles', 'mit', 'central', 'harvard', 'porter', 'davis', 'alewife']
+        for via in ('downtown', 'government')])
     assert len(path_states(longest_ride(boston))) == 16
     return 'test_ride passes'
 
 test_ride()
+
+#------------------------------------------------------------------------------
+# faster: the subway map is symmetric (every ride can be taken back on the
+# same line), so search from both ends at once until the two searches meet
+
+from udacity_4_search import bidirectional_search
+
+def ride2(here, there, system=boston):
+    return bidirectional_search(here, lambda s: system[s], there)
+
+def longest_ride2(system):
+    """
+    return the longest possible 'shortest path' ride between any two stops in the system.
+    """
+    return max([ride2(i, j, system) for i in system for j in system], key=len)
+
+def test_ride2():
+    assert ride2('mit', 'government') == [
+        'mit', 'red', 'charles', 'red', 'park', 'green', 'government']
+    assert ride2('mit', 'mit') == ['mit']
+    assert all(len(ride2(i, j)) == len(ride(i, j)) for i in boston for j in boston)
+    assert len(path_states(longest_ride2(boston))) == 16
+    return 'test_ride2 passes'
+
+test_ride2()
+
+#------------------------------------------------------------------------------
+# faster, for many queries: longest_ride runs a whole search for every pair
+# of stations. Instead, run one breadth first search per station, once, and 
+# keep a table of the next hop from every station towards every other one.
+# A ride is then just following next hops.
+
+class SubwayIndex(object):
+    """
+    All shortest rides in a subway(**lines) map. For stations i and j (by number),
+    dist[i][j] is the number of stops from i to j, and hop[i][j] is the
+    (next_station, line) on a shortest ride from i to j.
+    """
+    def __init__(self, system):
+        self.stations = list(system)
+        self.number = {s: i for (i, s) in enumerate(self.stations)}
+        V = len(self.stations)
+        self.dist = [[None]*V for _ in range(V)]
+        self.hop = [[None]*V for _ in range(V)]
+        for j in range(V):
+            # breadth first search from j; since the map is symmetric, 
+            # the parent of i on the way out of j is i's next hop back to j
+            self.dist[j][j] = 0
+            frontier = [j]
+            for i in frontier: # frontier grows as we go
+                for (s, line) in system[self.stations[i]].items():
+                    k = self.number[s]
+                    if self.dist[k][j] is None:
+                        self.dist[k][j] = self.dist[i][j] + 1
+                        self.hop[k][j] = (i, line)
+                        frontier.append(k)
+
+    def ride(self, here, there):
+        """
+        Return a path on the subway system from here to there.
+        """
+        i, j = self.number[here], self.number[there]
+        if self.dist[i][j] is None:
+            return []
+        path = [here]
+        while i != j:
+            i, line = self.hop[i][j]
+            path += [line, self.stations[i]]
+        return path
+
+    def distance(self, here, there):
+        "The number of stops on a shortest ride from here to there, or None."
+        return self.dist[self.number[here]][self.number[there]]
+
+    def longest_ride(self):
+        """
+        return the longest possible 'shortest path' ride between any two stops in the system.
+        """
+        V = range(len(self.stations))
+        i, j = max(((i, j) for i in V for j in V if self.dist[i][j] is not None),
+                   key=lambda ij: self.dist[ij[0]][ij[1]])
+        return self.ride(self.stations[i], self.stations[j])
+
+def test_subway_index():
+    index = SubwayIndex(boston)
+    assert index.ride('mit', 'government') == [
+        'mit', 'red', 'charles', 'red', 'park', 'green', 'government']
+    assert index.ride('mit', 'mit') == ['mit']
+    assert index.distance('mattapan', 'foresthills') == 7
+    assert all(len(index.ride(i, j)) == len(ride(i, j)) and
+               index.distance(i, j) == len(path_states(ride(i, j))) - 1
+               for i in boston for j in boston)
+    assert len(path_states(index.longest_ride())) == 16
+    island = SubwayIndex(subway(blue='a b', red='c d'))
+    assert island.ride('a', 'd') == [] and island.distance('a', 'c') is None
+    return 'test_subway_index passes'
+
+test_subway_index()
+
+#------------------------------------------------------------------------------
+# benchmark: list.pop(0) vs. deque frontier
+# with 6 glasses and an unreachable goal, breadth first search visits every
+# reachable state, and the frontier grows past 10**5 states
+
+import time
+from udacity_4_frontier import FIFOFrontier
+
+class ListFrontier(object):
+    "The old frontier: a list, where pop(0) moves every remaining state."
+    def __init__(self):
+        self.states = []
+    def add(self, state):
+        self.states.append(state)
+    def pop(self):
+        return self.states.pop(0)
+    def __len__(self):
+        return len(self.states)
+
+def timedcall(fn, *args):
+    "Call function with args; return the time in seconds and result."
+    t0 = time.perf_counter()
+    result = fn(*args)
+    t1 = time.perf_counter()
+    return t1-t0, result
+
+def benchmark_frontiers(capacities=(3, 5, 7, 11, 13, 17), goal=100):
+    "Time more_pour_problem with each kind of frontier."
+    for frontier in (ListFrontier, FIFOFrontier):
+        t, result = timedcall(more_pour_problem, capacities, goal, None, frontier())
+        print("%6.2f sec: %s" % (t, frontier.__name__))
+
+# slow: about 40 sec with ListFrontier and 25 sec with FIFOFrontier
+# benchmark_frontiers()
+
+#------------------------------------------------------------------------------
+# parallel: expand each layer of the search across a pool of processes
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from udacity_4_search import parallel_shortest_path_search
+
+def test_parallel_pour(executor):
+    for (capacities, goal) in [((1, 2, 4), 3), ((3, 5, 7, 11), 10), ((2, 3, 5, 7), 100)]:
+        start = (0,)*len(capacities)
+        successors = functools.partial(pour_successors, capacities)
+        assert parallel_shortest_path_search(
+            start, successors, lambda state: goal in state, 2, executor, min_layer=8) == (
+            more_pour_problem(capacities, goal))
+    return 'test_parallel_pour passes'
+
+def benchmark_parallel(capacities=(2, 3, 5, 7, 11, 13), goal=100, workers=(1, 2, 4, 8)):
+    "Time more_pour_problem, and parallel_shortest_path_search with each number of workers."
+    start = (0,)*len(capacities)
+    successors = functools.partial(pour_successors, capacities)
+    t, result = timedcall(more_pour_problem, capacities, goal)
+    print("%6.2f sec: sequential" % t)
+    for n in workers:
+        with ProcessPoolExecutor(n) as executor:
+            t, result = timedcall(parallel_shortest_path_search, start, successors,
+                                  lambda state: goal in state, n, executor)
+        print("%6.2f sec: %d workers" % (t, n))
+
+# about 2.7 sec sequential, and 3.4 sec with 1 worker: the layers are
+# shipped to the worker and back. on a machine with 1 core, 2 and 4 workers
+# take 4.0 and 4.6 sec; the speedup needs as many cores as workers.
+# benchmark_parallel()
+
+# threads at import, processes as a script: see udacity_4_search.py
+with ThreadPoolExecutor(2) as executor:
+    test_parallel_pour(executor)
+
+if __name__ == '__main__':
+    with ProcessPoolExecutor(2) as executor:
+        test_parallel_pour(executor)
@@ -1,31 +1,44 @@
+# def pour_problem(X, Y, goal, start=(0, 0)):
+# 	"""
+# 	X and Y are the capacity of glasses; (x, y) is current fill levels
+# 	and represents a state. The goal is a level that can be in either glass.
+# 	Start at the start state and follow successors until we reach the goal.
+# 	Keep track of frontier and previously explored; fail when no frontier.
+# 	"""
+# 	Fail = []
+# 	if goal in start:
+# 		return [start]
+# 	explored = set()
+# 	frontier = [[start]]
+# 	while frontier:
+# 		path = frontier.pop(0)  # first sequence removed
+# 		(x, y) = path[-1]  # unpack last state of first sequence
+# 		# get a new possible next state
+# 		for (state, action) in successors(x, y, X, Y).items():
+# 			# no point going back to already-explored states
+# 			if state not in explored:
+# 				# add to explored set
+# 				explored.add(state)  
+# 				# add to path length, only if progress made
+# 				path2 = path + [action, state]  
+# 				if goal in state:
+# 					return path2
+# 				else:
+# 					frontier.append(path2)
+# 	return Fail  # if all frontier tried 
+
+# better: let the search core keep the frontier and explored states
+# (parent pointers, instead of a copy of the path for every successor)
+from udacity_4_search import shortest_path_search
+
 def pour_problem(X, Y, goal, start=(0, 0)):
 	"""
 	X and Y are the capacity of glasses; (x, y) is current fill levels
 	and represents a state. The goal is a level that can be in either glass.
 	Start at the start state and follow successors until we reach the goal.
-	Keep track of frontier and previously explored; fail when no frontier.
 	"""
-	Fail = []
-	if goal in start:
-		return [start]
-	explored = set()
-	frontier = [[start]]
-	while frontier:
-		path = frontier.pop(0)  # first sequence removed
-		(x, y) = path[-1]  # unpack last state of first sequence
-		# get a new possible next state
-		for (state, action) in successors(x, y, X, Y).items():
-			# no point going back to already-explored states
-			if state not in explored:
-				# add to explored set
-				explored.add(state)  
-				# add to path length, only if progress made
-				path2 = path + [action, state]  
-				if goal in state:
-					return path2
-				else:
-					frontier.append(path2)
-	return Fail  # if all frontier tried 
+	return shortest_path_search(
+		start, lambda state: successors(*state, X, Y), lambda state: goal in state)
 
 def successors(x, y, X, Y):
 	"""
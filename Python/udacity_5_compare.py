@@ -0,0 +1,113 @@
+#------------------------------------------------------------------------------
+# comparing strategies
+# used with:
+# udacity_5_foxes_hens.py
+# udacity_5_pig_double.py
+#
+# superior() and strategy_compare() play a fixed number of games, and every
+# game deals its own random cards or dice. three ways to need fewer games:
+# * common random numbers: play both strategies with the same cards or dice
+#   (the same seed) and look at the difference: the luck of the deal cancels
+#   out, so the differences vary much less than the scores do
+# * sequential testing: play in batches, and stop as soon as the difference
+#   is clearly above (or below) the margin
+# * play the batches of a round in parallel, in worker processes
+
+import itertools
+from math import sqrt, ceil
+from statistics import NormalDist, mean, stdev
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from udacity_5_random import BufferedRandom, buffered_dierolls, child_seeds
+from udacity_5_foxes_hens import foxes_and_hens, strategy, take5, optimal
+from udacity_5_pig_double import play_pig_d, hold_20_d, max_points
+
+# a match plays A and B on the same random numbers, from seed,
+# and returns how much better A did.
+
+def foxes_match(A, B, seed):
+    """
+    A's score minus B's, in games of foxes and hens with the same cards.
+    """
+    # a game draws 52 cards
+    return (foxes_and_hens(A, rng=BufferedRandom(seed, 64))
+            - foxes_and_hens(B, rng=BufferedRandom(seed, 64)))
+
+def pig_d_match(A, B, seed):
+    """
+    A's points minus B's, over two games of pig with doubling with the same
+    dice: one where A goes first, and one where B does.
+    """
+    total = 0
+    for players in [(A, B), (B, A)]:
+        winner, points = play_pig_d(*players, dierolls=buffered_dierolls(seed=seed, block=256))
+        total += points if winner == A else -points
+    return total
+
+def play_matches(match, A, B, seeds):
+    return [match(A, B, seed) for seed in seeds]
+
+def compare(match, A, B, margin=0, alpha=0.05, batch=100, max_trials=20000,
+            workers=4, executor=None, seed=0):
+    """
+    Play match(A, B, seed) with independent seeds spawned from seed (by
+    child_seeds), workers batches at a time, until the mean difference is
+    significantly above or below margin, or max_trials matches have been played.
+    Return (verdict, mean, half_width, trials), where verdict is 1 if A beats
+    B by more than margin, -1 if it doesn't, and 0 if we can't tell.
+    """
+    if executor is None:
+        with ProcessPoolExecutor(workers) as executor:
+            return compare(match, A, B, margin, alpha, batch, max_trials, 
+                           workers, executor, seed)
+    # we look at the differences after every round: split alpha between the
+    # looks, so that all the looks together are wrong at most alpha of the time
+    looks = ceil(max_trials / float(batch * workers))
+    z = NormalDist().inv_cdf(1 - alpha / (2 * looks))
+    seeds = child_seeds(seed)
+    diffs = []
+    for _ in range(looks):
+        batches = [list(itertools.islice(seeds, batch)) for _ in range(workers)]
+        for result in executor.map(play_matches, itertools.repeat(match),
+                                   itertools.repeat(A), itertools.repeat(B), batches):
+            diffs.extend(result)
+        m, half = mean(diffs), z * stdev(diffs) / sqrt(len(diffs))
+        if m - half > margin:
+            return 1, m, half, len(diffs)
+        elif m + half < margin:
+            return -1, m, half, len(diffs)
+    return 0, m, half, len(diffs)
+
+def test():
+    # the same seed gives the same cards
+    assert foxes_match(take5, take5, 7) == 0
+    # paired differences vary much less than unpaired ones
+    paired = [foxes_match(strategy, take5, seed) for seed in range(2000)]
+    unpaired = [foxes_and_hens(strategy, rng=BufferedRandom(seed, 64))
+                - foxes_and_hens(take5, rng=BufferedRandom(seed + 10**6, 64))
+                for seed in range(2000)]
+    assert stdev(paired) < stdev(unpaired)
+    return 'tests pass'
+
+test()
+
+def test_parallel(executor):
+    # strategy beats take5 by 2.79 points on average
+    verdict, m, half, trials = compare(foxes_match, strategy, take5, 1.5, 
+                                       workers=2, executor=executor)
+    assert verdict == 1 and abs(m - 2.79) < half and trials < 2000
+    verdict, m, half, trials = compare(foxes_match, strategy, optimal, 
+                                       workers=2, executor=executor)
+    assert verdict == -1
+    verdict, m, half, trials = compare(pig_d_match, max_points, hold_20_d, 
+                                       workers=2, executor=executor)
+    assert verdict == 1
+    return 'test_parallel passes'
+
+# threads at import, processes as a script: see udacity_4_search.py
+with ThreadPoolExecutor(2) as executor:
+    test_parallel(executor)
+
+if __name__ == '__main__':
+    with ProcessPoolExecutor(2) as executor:
+        test_parallel(executor)
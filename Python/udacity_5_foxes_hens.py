@@ -16,14 +16,15 @@
 
 import random
 
-def foxes_and_hens(strategy, foxes=7, hens=45):
+def foxes_and_hens(strategy, foxes=7, hens=45, rng=random):
     """
-    Play the game of foxes and hens
+    Play the game of foxes and hens, drawing cards with rng
+    (a random.Random, to replay the same cards).
     """
     state = (score, yard, cards) = (0, 0, "F"*foxes + "H"*hens)
     while cards:
         action = strategy(state)
-        state = (score, yard, cards) = do(action, state)
+        state = (score, yard, cards) = do(action, state, rng)
     return score + yard
 
 # def do(action, state):
@@ -45,12 +46,13 @@ def foxes_and_hens(strategy, foxes=7, hens=45):
 #         return (score + yard, 0, cards)
 
 # more concise than shuffling and popping
-def do(action, state):
+# rng can also be a BufferedRandom, from udacity_5_random.py
+def do(action, state, rng=random):
     """
     Apply action to state, returning a new state.
     """
     score, yard, cards = state
-    card = random.choice(cards)
+    card = rng.choice(cards)
     cards_left = cards.replace(card, "", 1)
     if action == "wait":
         if card == "H":
@@ -96,11 +98,149 @@ def take5(state):
 def average_score(strategy, N=1000):
     return sum(foxes_and_hens(strategy) for _ in range(N)) / float(N)
 
+# def superior(A, B=take5):
+#     """
+#     Does strategy A have a higher average score than B, by more than 1.5 point?
+#     """
+#     return average_score(A) - average_score(B) > 1.5
+
+# better: compare exact expected scores (see below), no sampling noise
 def superior(A, B=take5):
     """
-    Does strategy A have a higher average score than B, by more than 1.5 point?
+    Does strategy A have a higher expected score than B, by more than 1.5 point?
+    """
+    return expected_score(A) - expected_score(B) > 1.5
+
+#------------------------------------------------------------------------------
+# exact expected scores:
+# all that matters about the cards left is how many foxes and hens there are,
+# and the chance that the next card is a fox is foxes/(foxes+hens).
+# so the expected final score from a state is an average over the two cards
+# that can come next, computed backwards from the end of the deck.
+# there are only ~140,000 states (score, yard, foxes, hens) in a 7/45 game.
+
+def expected_score(strategy, foxes=7, hens=45):
+    """
+    The exact expected final score of a game played with strategy.
+    """
+    cache = {}
+    def E(score, yard, f, h):
+        if not (f or h):
+            return score + yard
+        state = (score, yard, f, h)
+        if state not in cache:
+            if strategy((score, yard, "F"*f + "H"*h)) == "wait":
+                yard_if_hen = yard + 1
+            else:
+                score, yard_if_hen = score + yard, 0
+            fox = E(score, 0, f-1, h) if f else 0
+            hen = E(score, yard_if_hen, f, h-1) if h else 0
+            cache[state] = (f*fox + h*hen) / float(f + h)
+        return cache[state]
+    return E(0, 0, foxes, hens)
+
+# the best strategy: score is banked, so it makes no difference to what
+# happens next; the expected points still to come depend on (yard, foxes, hens)
+
+from udacity_5_mdp import keyed_memo
+
+def Q_fh(yard, foxes, hens, action):
+    """
+    The expected points still to come, for doing action and then playing
+    the best strategy.
+    """
+    if not (foxes or hens):
+        return yard
+    gathered = yard if action == "gather" else 0
+    yard_if_hen = yard + 1 if action == "wait" else 0
+    fox = best_points(0, foxes-1, hens) if foxes else 0
+    hen = best_points(yard_if_hen, foxes, hens-1) if hens else 0
+    return gathered + (foxes*fox + hens*hen) / float(foxes + hens)
+
+# ~17,000 (yard, foxes, hens) states for 7 foxes and 45 hens; bigger decks
+# keep the 10**5 most recently used
+@keyed_memo(maxsize=10**5)
+def best_points(yard, foxes, hens):
+    """
+    The expected points still to come from a state, with the best strategy.
+    """
+    return max(Q_fh(yard, foxes, hens, action) for action in ("wait", "gather"))
+
+def optimal(state):
+    """
+    The strategy that maximizes the expected score.
     """
-    return average_score(A) - average_score(B) > 1.5
+    _, yard, cards = state
+    foxes, hens = cards.count("F"), cards.count("H")
+    return max(["wait", "gather"], key=lambda action: Q_fh(yard, foxes, hens, action))
+
+# the same, as a Markov decision process (see udacity_5_mdp.py)
+
+from udacity_5_mdp import MDP, expectimax
+
+def fh_transitions(state, action):
+    score, yard, cards = state
+    result = []
+    for card in set(cards):
+        p = cards.count(card) / float(len(cards))
+        cards_left = cards.replace(card, "", 1)
+        if action == "gather":
+            result.append((p, (score + yard, 0, cards_left)))
+        elif card == "H":
+            result.append((p, (score, yard + 1, cards_left)))
+        else:
+            result.append((p, (score, 0, cards_left)))
+    return result
+
+def fh_terminal(state):
+    score, yard, cards = state
+    return None if cards else score + yard
+
+fh_mdp = MDP(lambda state: ["wait", "gather"], fh_transitions, fh_terminal)
+
+#------------------------------------------------------------------------------
+# many games at once:
+# foxes_and_hens picks a random card from a string, and builds a new string
+# for the cards left, on every draw. instead, keep the deck as counts of
+# foxes and hens left, and play many games in lockstep with numpy arrays.
+# every game draws one card per step, so they all end together.
+
+import numpy as np
+
+def strategy_table(strategy, foxes=7, hens=45):
+    """
+    Does strategy wait? As an array indexed by [score, yard, foxes, hens].
+    """
+    table = np.zeros((hens+1, hens+1, foxes+1, hens+1), dtype=bool)
+    for f in range(foxes+1):
+        for h in range(hens+1):
+            cards = "F"*f + "H"*h
+            # hens that have been drawn are scored, in the yard or lost
+            for score in range(hens - h + 1):
+                for yard in range(hens - h - score + 1):
+                    table[score, yard, f, h] = strategy((score, yard, cards)) == "wait"
+    return table
+
+def play_games(strategy, games=10000, foxes=7, hens=45, seed=None):
+    """
+    Play games of foxes and hens with strategy, all at once.
+    Return an array of the final scores.
+    """
+    rng = np.random.default_rng(seed)
+    waits = strategy_table(strategy, foxes, hens)
+    score, yard = np.zeros(games, dtype=int), np.zeros(games, dtype=int)
+    f, h = np.full(games, foxes), np.full(games, hens)
+    for _ in range(foxes + hens):
+        wait = waits[score, yard, f, h]
+        fox = rng.random(games) * (f + h) < f
+        score += np.where(wait, 0, yard)
+        yard = np.where(wait & ~fox, yard + 1, 0)
+        f -= fox
+        h -= ~fox
+    return score + yard
+
+def average_score2(strategy, N=1000):
+    return play_games(strategy, N).mean()
 
 def test():
     gather = do('gather', (4, 5, 'F'*4 + 'H'*10))
@@ -112,6 +252,16 @@ def test():
             wait == (10, 0, 'FHH'))
     
     assert superior(strategy)
+    assert not superior(take5, strategy)
+    # exact, and the best strategy is the best
+    assert abs(expected_score(optimal) - best_points(0, 7, 45)) < 1e-9
+    assert expected_score(optimal) >= expected_score(strategy) >= expected_score(take5)
+    assert expected_score(take5, foxes=1, hens=1) == 0.5
+    assert abs(expectimax(fh_mdp)((0, 0, "FFFHHHHHHHHHH")) - best_points(0, 3, 10)) < 1e-9
+    # simulations agree with the exact expected scores
+    for s in (strategy, take5, optimal):
+        scores = play_games(s, 20000, seed=1)
+        assert abs(scores.mean() - expected_score(s)) < 4 * scores.std() / np.sqrt(len(scores))
     return 'tests pass'
 
 test()   
@@ -0,0 +1,277 @@
+#------------------------------------------------------------------------------
+# Markov decision processes
+# used by:
+# udacity_5_pig.py
+# udacity_5_pig_double.py
+# udacity_5_foxes_hens.py
+# udacity_7_5_darts_probability.py
+#
+# best_action and Q_pig in udacity_5_pig.py are a small expectimax:
+# the utility of a state is the best expected utility of its actions, and
+# the expected utility of an action averages over the states it can lead to.
+# the same idea solves any game that says:
+# * actions(state): the legal actions in a state
+# * transitions(state, action): the [(probability, next_state)] it can lead to
+# * terminal(state): the utility of a state where the game is over, else None
+# and, for a game of two players taking turns:
+# * turn(state): whose turn it is
+# * other(utility): the utility for the other player (-u for points won,
+#   1-u for a probability of winning)
+#
+# three ways to solve one:
+# * expectimax: memoized recursion from a state; only for games that can't
+#   go back to an earlier state (no cycles)
+# * value_iteration: sweep over all the states, updating each one from the
+#   others, until the utilities stop changing
+# * policy_iteration: pick an action for every state, find the utilities of
+#   playing that way, pick better actions, and repeat until nothing changes
+
+# memoized utilities: a plain memo keeps one entry per distinct args,
+# forever. two knobs:
+# * key: equivalent args often give the same result (e.g. Pwin doesn't care
+#   whose turn it is, only what the player to move has), so let them share
+#   one entry: cache[key(*args)]
+# * maxsize: keep at most maxsize entries, dropping the least recently used.
+#   a dropped entry is just computed again when it is needed.
+# the games' own memoized utilities use keyed_memo too, with a maxsize.
+
+from functools import update_wrapper
+from collections import OrderedDict
+
+def decorator(d):
+    """
+    Make function d a decorator: d wraps a function fn.
+    """
+    def _d(fn):
+        return update_wrapper(d(fn), fn)
+    update_wrapper(_d, d)
+    return _d
+
+def keyed_memo(key=None, maxsize=None):
+    """
+    Return a decorator that caches f(*args) under key(*args), keeping at
+    most maxsize entries (None for no limit).
+    """
+    @decorator
+    def memo(f):
+        cache = OrderedDict()
+        def _f(*args):
+            k = key(*args) if key else args
+            try:
+                result = cache[k]
+            except KeyError:
+                result = cache[k] = f(*args)
+                if maxsize is not None and len(cache) > maxsize:
+                    cache.popitem(last=False)
+                return result
+            except TypeError:
+                # some element of k can't be a dict key
+                return f(*args)
+            if maxsize is not None:
+                cache.move_to_end(k)
+            return result
+        _f.cache = cache
+        return _f
+    return memo
+
+class MDP(object):
+    """
+    A Markov decision process. See the comment above for the functions that
+    describe it. reward(state, action, next_state) is added to the utility of
+    each transition (0 by default); key(state) is the state's entry in
+    caches and tables, so equivalent states can share one.
+    """
+    def __init__(self, actions, transitions, terminal, turn=None, other=None,
+                 reward=None, key=None):
+        self.actions = actions
+        self.transitions = transitions
+        self.terminal = terminal
+        self.turn = turn or (lambda state: None)
+        self.other = other or (lambda utility: -utility)
+        self.reward = reward or (lambda state, action, next_state: 0)
+        self.key = key or (lambda state: state)
+
+    def Q(self, state, action, U):
+        """
+        The expected utility of doing action in state, for the player to
+        move, where U(state) is the utility for the player to move in state.
+        """
+        turn = self.turn(state)
+        total = 0.
+        for (p, next_state) in self.transitions(state, action):
+            u = U(next_state)
+            if self.turn(next_state) != turn:
+                u = self.other(u)
+            total += p * (self.reward(state, action, next_state) + u)
+        return total
+
+    def best_action(self, state, U):
+        return max(self.actions(state), key=lambda action: self.Q(state, action, U))
+
+    def utility(self, state, U):
+        return max(self.Q(state, action, U) for action in self.actions(state))
+
+def reachable(mdp, start):
+    """
+    All the states that can be reached from start, that are not over, one
+    for each key. Each state comes after all the states it can lead to,
+    unless the game has cycles.
+    """
+    def next_states(state):
+        return (s for action in mdp.actions(state)
+                for (_, s) in mdp.transitions(state, action))
+    states, seen = [], set([mdp.key(start)])
+    stack = [(start, next_states(start))] # depth first, without recursion
+    while stack:
+        state, children = stack[-1]
+        for child in children:
+            k = mdp.key(child)
+            if k not in seen and mdp.terminal(child) is None:
+                seen.add(k)
+                stack.append((child, next_states(child)))
+                break
+        else:
+            stack.pop()
+            states.append(state)
+    return states
+
+def table_utility(mdp, values):
+    """
+    A function U(state) that looks up the utility of a state in the table
+    values, {key: utility}, unless the game is over.
+    """
+    def U(state):
+        u = mdp.terminal(state)
+        return u if u is not None else values[mdp.key(state)]
+    U.values = values
+    return U
+
+def expectimax(mdp, maxsize=None):
+    """
+    Return a function U(state): the utility for the player to move, if
+    everyone plays their best, memoized by key, at most maxsize states.
+    """
+    @keyed_memo(mdp.key, maxsize)
+    def utility(state):
+        return mdp.utility(state, U)
+    def U(state):
+        u = mdp.terminal(state)
+        return u if u is not None else utility(state)
+    U.cache = utility.cache
+    return U
+
+# both iterations update the table in place, in the order the states are
+# given; states that are late in the game should come first, so their
+# utilities are ready when the earlier ones need them, as reachable() does.
+# (for a game without cycles, that way one sweep gets every utility right,
+# and one more shows that nothing changes.)
+
+def value_iteration(mdp, states, epsilon=1e-9, max_sweeps=10000):
+    """
+    Find the utility of every state in states by sweeping over them until
+    no utility changes by more than epsilon.
+    Return (U, history): U(state) is the utility for the player to move,
+    and history is the biggest change in each sweep.
+    """
+    U = table_utility(mdp, {mdp.key(s): 0. for s in states})
+    values, history = U.values, []
+    while len(history) < max_sweeps:
+        delta = 0.
+        for state in states:
+            k = mdp.key(state)
+            u = mdp.utility(state, U)
+            delta = max(delta, abs(u - values[k]))
+            values[k] = u
+        history.append(delta)
+        if delta <= epsilon:
+            break
+    return U, history
+
+def policy_iteration(mdp, states, policy=None, epsilon=1e-9, max_iterations=100,
+                     max_sweeps=10000):
+    """
+    Find the best action for every state in states, starting from policy
+    (a function from state to action; by default, the first legal action).
+    Each evaluation sweeps at most max_sweeps times, as value_iteration does.
+    Return (policy, U, history): the best policy, the utility of each state
+    when playing it, and the number of actions changed in each iteration.
+    """
+    actions = {mdp.key(s): policy(s) if policy else mdp.actions(s)[0] for s in states}
+    U = table_utility(mdp, {mdp.key(s): 0. for s in states})
+    values, history = U.values, []
+    while len(history) < max_iterations:
+        # evaluate: the utilities of playing the current actions. a policy
+        # that never ends the game (like always standing still) has no
+        # utility: its values only drift, so stop after max_sweeps
+        for _ in range(max_sweeps):
+            delta = 0.
+            for state in states:
+                k = mdp.key(state)
+                u = mdp.Q(state, actions[k], U)
+                delta = max(delta, abs(u - values[k]))
+                values[k] = u
+            if delta <= epsilon:
+                break
+        # improve: switch to a better action, if there is one, and update
+        # the state's utility, so the states that come before it (which
+        # lead to it) see the change in this same pass
+        changes = 0
+        for state in states:
+            k = mdp.key(state)
+            best = mdp.best_action(state, U)
+            u = mdp.Q(state, best, U)
+            if u > mdp.Q(state, actions[k], U) + epsilon:
+                actions[k] = best
+                values[k] = u
+                changes += 1
+        history.append(changes)
+        if not changes:
+            break
+    return (lambda state: actions[mdp.key(state)]), U, history
+
+#------------------------------------------------------------------------------
+# test
+
+def test():
+    # walk to 10: each move costs 1. 'step' goes 1 ahead; 'leap' goes 3 ahead
+    # half the time, and stays put the other half: 2 moves per 3, on average
+    walk = MDP(actions=lambda n: ['step', 'leap'],
+               transitions=lambda n, a: [(1, n+1)] if a == 'step' else [(.5, n+3), (.5, n)],
+               terminal=lambda n: 0 if n >= 10 else None,
+               reward=lambda n, a, n2: -1)
+    states = reachable(walk, 0)
+    assert states == list(range(9, -1, -1))
+    U, history = value_iteration(walk, states)
+    assert history[-1] <= 1e-9 < history[0]
+    assert abs(U(9) + 1) < 1e-6 and abs(U(8) + 2) < 1e-6 and abs(U(7) + 2) < 1e-6
+    policy, U2, history = policy_iteration(walk, states)
+    assert history[-1] == 0
+    assert all(abs(U(n) - U2(n)) < 1e-6 for n in states)
+    assert policy(9) == 'step' and policy(7) == 'leap'
+    # starting from a policy that never gets anywhere: 'stay' comes first
+    stay = MDP(actions=lambda n: ['stay', 'step', 'leap'],
+               transitions=lambda n, a: [(1, n)] if a == 'stay' else walk.transitions(n, a),
+               terminal=walk.terminal, reward=walk.reward)
+    policy, U2, history = policy_iteration(stay, states, max_sweeps=1000)
+    assert history[0] == len(states) and history[-1] == 0
+    assert all(abs(U(n) - U2(n)) < 1e-6 for n in states)
+    assert policy(9) == 'step' and policy(7) == 'leap'
+    # two players: take 1 or 2 from a pile; whoever takes the last one wins
+    nim = MDP(actions=lambda s: [1, 2] if s[1] > 1 else [1],
+              transitions=lambda s, a: [(1, (1 - s[0], s[1] - a))],
+              terminal=lambda s: 0 if s[1] == 0 else None, # the other player took the last one
+              turn=lambda s: s[0], other=lambda u: 1 - u,
+              key=lambda s: s[1])
+    U = expectimax(nim)
+    assert [U((0, n)) for n in range(1, 7)] == [1, 1, 0, 1, 1, 0]
+    assert len(U.cache) == 6
+    U = expectimax(nim, maxsize=2)
+    assert [U((0, n)) for n in range(1, 7)] == [1, 1, 0, 1, 1, 0]
+    assert len(U.cache) == 2
+    states = reachable(nim, (0, 6))
+    U2, history = value_iteration(nim, states)
+    assert len(history) == 2
+    assert all(U(s) == U2(s) for s in states)
+    return 'tests pass'
+
+test()
@@ -1,34 +1,8 @@
 #------------------------------------------------------------------------------
 # utilities
 
-from functools import update_wrapper
-
-def decorator(d):
-    """
-    Make function d a decorator: d wraps a function fn.
-    """
-    def _d(fn):
-        return update_wrapper(d(fn), fn)
-    update_wrapper(_d, d)
-    return _d
-
-@decorator
-def memo(f):
-    """
-    Decorator that caches the return value for each call to f(args).
-    Then when called again with same args, we can just look it up.
-    """
-    cache = {}
-    def _f(*args):
-        try:
-            return cache[args]
-        except KeyError:
-            cache[args] = result = f(*args)
-            return result
-        except TypeError:
-            # some element of args can't be a dict key
-            return f(args)
-    return _f
+# memoized utilities are cached by keyed_memo (see udacity_5_mdp.py)
+from udacity_5_mdp import keyed_memo
 
 #------------------------------------------------------------------------------
 # game of pig 
@@ -38,6 +12,15 @@ import random
 other = {0:1, 1:0}  # mapping table, instead of if-else statement
 goal = 40
 
+# the utilities of states are cached by (me, you, pending), not by player:
+# the value of a state is the same whoever is to move.
+# and at most memo_size states are kept.
+memo_size = 10**6
+
+def pig_key(state):
+    _, me, you, pending = state
+    return me, you, pending
+
 def hold(state):
     """
     Apply the hold action to a state to yield a new state:
@@ -178,7 +161,7 @@ def Q_pig(state, action, utility):
 # recursively traverse backwards from end point
 # let's say win = 1, loose = 0
 # assumes opponent also plays with optimal strategy
-@memo
+@keyed_memo(pig_key, memo_size)
 def Pwin(state):
     """
     The utility of a state = probability that an optimal player
@@ -194,7 +177,7 @@ def Pwin(state):
 
 # expected utility of a state, given end goal
 # hmm, not sure if Q_pig should take non-probability based utility?
-@memo
+@keyed_memo(pig_key, memo_size)
 def win_diff(state):
     """
     The utility of a state: here the winning differential (pos or neg)
@@ -221,7 +204,7 @@ def Pwin2(state):
 # both "me" and "you" have the same strategy:
 # * roll if nothing pending, else see if hold or roll is better
 # * instead of using Q to get expected utility, write one that takes fewer inputs
-@memo
+@keyed_memo(maxsize=memo_size)
 def Pwin3(me, you, pending):
     if me + pending >= goal:
         return 1
@@ -250,6 +233,240 @@ def test():
 
 test()
 
+def test_memo():
+    calls = []
+    @keyed_memo(pig_key, maxsize=2)
+    def f(state):
+        calls.append(state)
+        return sum(state[1:])
+    assert f((0, 1, 2, 3)) == f((1, 1, 2, 3)) == 6  # one entry for both players
+    assert f((0, 1, 2, 4)) == 7 and len(calls) == 2
+    f((0, 1, 2, 3))                                  # now most recently used
+    f((0, 5, 5, 5))                                  # evicts (1, 2, 4)
+    assert list(f.cache) == [(1, 2, 3), (5, 5, 5)]
+    f((1, 1, 2, 4))
+    assert len(calls) == 4
+    assert f.__name__ == 'f'
+    # Pwin keeps one entry per (me, you, pending)
+    assert Pwin((0, 10, 20, 3)) == Pwin((1, 10, 20, 3))
+    assert all(isinstance(k, tuple) and len(k) == 3 for k in Pwin.cache)
+    return "test_memo passes"
+
+test_memo()
+
+#------------------------------------------------------------------------------
+# pig as a Markov decision process:
+# best_action and Q_pig, generalized in udacity_5_mdp.py
+
+from udacity_5_mdp import MDP, expectimax, reachable, value_iteration
+
+def pig_transitions(state, action):
+    if action == "hold":
+        return [(1, hold(state))]
+    elif action == "roll":
+        return [(1/6., roll(state, d)) for d in (1, 2, 3, 4, 5, 6)]
+    raise ValueError
+
+def pig_terminal(state):
+    _, me, you, pending = state
+    if me + pending >= goal:
+        return 1
+    elif you >= goal:
+        return 0
+
+pig_mdp = MDP(pig_actions, pig_transitions, pig_terminal,
+              turn=lambda state: state[0], other=lambda u: 1 - u, key=pig_key)
+
+def test_mdp():
+    epsilon = 1e-12
+    U = expectimax(pig_mdp)
+    for state in [(0, 0, 0, 0), (0, 25, 32, 8), (1, 19, 35, 4), (0, 34, 42, 1)]:
+        assert abs(U(state) - Pwin(state)) <= epsilon
+    assert pig_mdp.best_action((0, 10, 20, 3), U) == max_wins((0, 10, 20, 3))
+    # pig has no cycles: one sweep does it
+    states = reachable(pig_mdp, (0, 0, 0, 0))
+    U2, history = value_iteration(pig_mdp, states)
+    assert len(history) == 2 and history[-1] == 0
+    assert all(abs(U(s) - U2(s)) <= epsilon for s in states)
+    return "test_mdp passes"
+
+test_mdp()
+
+#------------------------------------------------------------------------------
+# table-driven Pwin:
+# the memoized Pwin3 recurses once per point of pending, so for goals much
+# above 40 it hits the recursion limit, and every state costs a function call
+# and a dict lookup. instead, fill a table bottom up, in dependency order:
+# * hold and roll 1 pass the turn: (me, you, p) -> (you, me+p, 0) or (you, me+1, 0)
+#   both have a bigger total score me+you, so fill by me+you, biggest first
+# * roll d > 1 keeps the turn: (me, you, p) -> (me, you, p+d)
+#   so within one (me, you), fill by pending, biggest first
+# all the cells with the same me+you are independent of each other:
+# numpy fills them together, one pending value at a time.
+#
+# a dense (me, you, pending) table of floats has ~goal**3/2 cells (4GB at
+# goal=1000), but passing the turn always lands on pending = 0, so only keep
+# * P0[me, you] = Pwin((me, you, 0))
+#   a game asks about one (me, you) at a time: recompute its row of pending
+#   values from P0 when asked, and cache a few rows.
+# * policy[me, you, pending]: 1 bit, is hold the best action?
+#   packed 8 pendings to a byte (125MB at goal=1000)
+
+import numpy as np
+from functools import lru_cache
+
+class PigTable(object):
+    """
+    Pwin for every state of a game of pig to the given goal, with a die with
+    the given number of sides, solved bottom up.
+    """
+    def __init__(self, goal=goal, die=6, P0=None, policy=None, rows=1024):
+        self.goal, self.die = goal, die
+        self.row = lru_cache(maxsize=rows)(self.row)
+        if P0 is not None:
+            self.P0, self.policy = P0, policy
+            return
+        self.policy = np.zeros((goal, goal, (goal + 7) // 8), dtype=np.uint8)
+        # fill by anti-diagonals: D[me+you, me] = Pwin((me, you, 0)), so that
+        # each diagonal, and each lookup into the one above it, is a slice.
+        # cells with you >= goal are never filled: zero, the other player has won
+        self.D = np.zeros((2*goal + die, goal))
+        for total in range(2*goal - 2, -1, -1):
+            self.fill(total)
+        me, you = np.indices((goal, goal+1))
+        self.P0 = self.D[me+you, me]
+        del self.D
+
+    def fill(self, total):
+        """
+        Fill the diagonal of cells with me + you = total.
+        """
+        goal, die, D = self.goal, self.die, self.D
+        lo, hi = max(0, total - goal + 1), min(total, goal - 1) # range of me
+        yous = slice(total - hi, total - lo + 1) # you, for me = hi down to lo
+        # W[pending, i] = Pwin for cell (me, you) = (hi - i, total - hi + i):
+        # me + pending >= goal is a win
+        mes = np.arange(hi, lo - 1, -1)
+        W = (np.arange(goal + die)[:, None] + mes >= goal).astype(float)
+        holds = np.zeros((goal, len(mes)), dtype=bool)
+        pig_out = 1 - D[total + 1, yous]
+        top = goal - lo - 1
+        window = W[top+2:top+die+1].sum(axis=0) # W[p+2:p+die+1], kept up to date
+        for p in range(top, -1, -1):
+            rows = slice(max(0, hi + p - goal + 1), None) # cells with me + p < goal
+            roll = (pig_out[rows] + window[rows]) / die
+            if p:
+                hold = 1 - D[total + p, yous][rows]
+                holds[p, rows] = hold > roll
+                W[p, rows] = np.where(holds[p, rows], hold, roll)
+            else:
+                W[p, rows] = roll
+            window[rows] += W[p+1, rows] - W[p+die, rows]
+        D[total, lo:hi+1] = W[0, ::-1]
+        self.policy[mes, total - mes] = np.packbits(holds, axis=0).T
+
+    def row(self, me, you):
+        """
+        Pwin((me, you, pending)), for every pending with me + pending < goal.
+        """
+        goal, die, P0 = self.goal, self.die, self.P0[you]
+        pig_out = 1 - P0[me + 1]
+        W = [1.] * die
+        row = []
+        for p in range(goal - me - 1, -1, -1):
+            roll = (pig_out + sum(W[1:])) / die
+            hold = 1 - P0[me + p]
+            row.append(max(roll, hold) if p else roll)
+            W.insert(0, row[-1])
+            W.pop()
+        row.reverse()
+        return row
+
+    def Pwin(self, state):
+        """
+        The probability that an optimal player whose turn it is to move can
+        win from the current state.
+        """
+        _, me, you, pending = state
+        if me + pending >= self.goal:
+            return 1
+        elif you >= self.goal:
+            return 0
+        return float(self.row(me, you)[pending])
+
+    def max_wins(self, state):
+        """
+        The strategy that maximizes the probability of winning.
+        """
+        _, me, you, pending = state
+        bit = self.policy[me, you, pending >> 3] >> (7 - (pending & 7)) & 1
+        return "hold" if bit else "roll"
+
+@keyed_memo(maxsize=4)
+def pig_table(goal=goal, die=6):
+    return PigTable(goal, die)
+
+#------------------------------------------------------------------------------
+# persisted tables:
+# save a solved table as two .npy files, keyed by goal and die.
+# loading memory-maps them read only: no solving and no warm-up, and
+# processes forked after loading share one copy of the pages.
+
+import os
+import tempfile
+
+def pig_table_files(goal=goal, die=6, dirname='.'):
+    name = os.path.join(dirname, 'pig_goal%d_die%d' % (goal, die))
+    return name + '_Pwin.npy', name + '_policy.npy'
+
+def save_pig_table(table, dirname='.'):
+    """
+    Save table's arrays to dirname.
+    Each file is written under a temporary name and then renamed,
+    so a process loading the table never sees a partial file.
+    """
+    for (array, filename) in zip([table.P0, table.policy],
+                                 pig_table_files(table.goal, table.die, dirname)):
+        fd, tmp = tempfile.mkstemp(dir=dirname, suffix='.npy')
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp, filename)
+
+def load_pig_table(goal=goal, die=6, dirname='.'):
+    """
+    Load the table for goal and die from dirname, memory-mapped;
+    solve and save it first if it isn't there.
+    """
+    files = pig_table_files(goal, die, dirname)
+    if not all(os.path.exists(f) for f in files):
+        save_pig_table(PigTable(goal, die), dirname)
+    P0, policy = [np.load(f, mmap_mode='r') for f in files]
+    return PigTable(goal, die, P0, policy)
+
+def test_table():
+    epsilon = 1e-12
+    table = pig_table()
+    assert table.Pwin((0, 42, 25, 0)) == 1
+    assert table.Pwin((1, 12, 43, 0)) == 0
+    assert table.Pwin((0, 34, 42, 1)) == 0
+    states = [(0, me, you, pending)
+              for me in range(goal) for you in range(goal)
+              for pending in range(goal-me)]
+    assert all(abs(table.Pwin(s) - Pwin2(s)) <= epsilon for s in states)
+    assert all(table.max_wins(s) == max_wins(s) for s in states)
+    # goals far beyond the recursion limit
+    assert 0.5 < pig_table(200).Pwin((0, 0, 0, 0)) < 0.6
+    # saved and memory-mapped
+    with tempfile.TemporaryDirectory() as dirname:
+        loaded = load_pig_table(goal, 6, dirname)
+        assert isinstance(loaded.policy, np.memmap)
+        assert (loaded.P0 == table.P0).all()
+        assert all(loaded.max_wins(s) == max_wins(s) for s in states)
+        assert load_pig_table(goal, 6, dirname).Pwin((0, 25, 32, 8)) == table.Pwin((0, 25, 32, 8))
+    return "test_table passes"
+
+test_table()
+
 #------------------------------------------------------------------------------
 # max_wins vs. max_diffs
 # breaking program down to understand differences and why
@@ -292,3 +509,116 @@ def story():
     for (delta, (wrolls, drolls)) in sorted(r.items()):
         print("%4d: %3d %3d" % (delta, wrolls, drolls))
 story()
+
+#------------------------------------------------------------------------------
+# tournaments:
+# play_pig plays one game at a time, one die roll at a time from a generator.
+# to compare strategies over millions of games, play them all in lockstep:
+# * each strategy becomes a table of how likely it is to hold in each state
+# * the state of every game is a column of numpy arrays
+# * die rolls are drawn ahead, a block of steps for every game at a time
+# each step moves every game still being played by one decision.
+
+import itertools
+from math import sqrt
+
+clueless.hold_probability = 0.5
+
+def strategy_table(strategy, goal=goal):
+    """
+    The probability that strategy holds, as an array indexed by
+    [me, you, pending]. pending is capped at goal.
+    A strategy that chooses at random says how likely it is to hold
+    with a hold_probability attribute.
+    """
+    if hasattr(strategy, 'hold_probability'):
+        return np.full((goal, goal, goal+1), strategy.hold_probability)
+    table = np.zeros((goal, goal, goal+1))
+    for (me, you, pending) in itertools.product(range(goal), range(goal), range(goal+1)):
+        table[me, you, pending] = strategy((0, me, you, pending)) == "hold"
+    return table
+
+def play_games(A, B, games=10000, goal=goal, die=6, seed=None, block=32):
+    """
+    Play games of pig between strategies A and B, with the same rules as
+    play_pig, except that holding with nothing pending counts as a roll.
+    A goes first in the even numbered games, B in the odd ones.
+    Return a boolean array: did A win each game?
+    """
+    rng = np.random.default_rng(seed)
+    tables = np.stack([strategy_table(A, goal), strategy_table(B, goal)])
+    randomized = not np.isin(tables, (0, 1)).all()
+    player = np.arange(games) % 2 # whose turn: 0 for A, 1 for B
+    score = np.zeros((2, games), dtype=int) # score[0] is A's
+    pending = np.zeros(games, dtype=int)
+    winner = np.zeros(games, dtype=int)
+    live = np.arange(games) # the games still being played
+    for step in itertools.count():
+        if not len(live):
+            return winner == 0
+        if step % block == 0:
+            rolls = rng.integers(1, die+1, size=(block, games), dtype=np.int8)
+            if randomized:
+                coins = rng.random((block, games), dtype=np.float32)
+        p, me, you = player[live], score[0, live], score[1, live]
+        me, you = np.where(p, you, me), np.where(p, me, you)
+        d, pend = rolls[step % block, live], pending[live]
+        coin = coins[step % block, live] if randomized else 0.5
+        holds = (pend > 0) & (coin < tables[p, me, you, np.minimum(pend, goal)])
+        pig_out = ~holds & (d == 1)
+        passes = holds | pig_out
+        me = me + np.where(holds, pend, 0) + pig_out
+        score[p, live] = me
+        pending[live] = np.where(passes, 0, pend + d)
+        player[live] = np.where(passes, 1 - p, p)
+        won = me >= goal
+        winner[live[won]] = p[won]
+        live = live[~won]
+
+def win_rate(wins, z=1.96):
+    """
+    The fraction of wins in a boolean array, with the Wilson score interval
+    around it (95% confidence for z=1.96): (rate, low, high).
+    """
+    n = len(wins)
+    rate = np.count_nonzero(wins) / n
+    center = (rate + z*z/(2*n)) / (1 + z*z/n)
+    half = z * sqrt(rate*(1 - rate)/n + z*z/(4*n*n)) / (1 + z*z/n)
+    return rate, center - half, center + half
+
+def tournament(strategies, games=10000, goal=goal, seed=None):
+    """
+    Play games between every pair of strategies; return {(A, B): (rate,
+    low, high)}: the win rate of A, the first of each pair, by name, with
+    its confidence interval.
+    """
+    return {(A.__name__, B.__name__): win_rate(play_games(A, B, games, goal, seed=seed))
+            for (A, B) in itertools.combinations(strategies, 2)}
+
+def show_tournament(results):
+    "Print the results of a tournament, one pair to a line."
+    for ((A, B), rate) in results.items():
+        print("%-12s vs %-12s %.4f (%.4f, %.4f)" % ((A, B) + rate))
+
+def test_tournament():
+    # agrees with play_pig
+    A, B = hold_at(20), hold_at(10)
+    random.seed(1)
+    wins = [play_pig(*players) == A for _ in range(1000) for players in [(A, B), (B, A)]]
+    rate, low, high = win_rate(play_games(A, B, 20000, seed=1))
+    assert low - 0.03 < np.mean(wins) < high + 0.03
+    # deterministic, given a seed
+    assert (play_games(A, clueless, 1000, seed=2) == play_games(A, clueless, 1000, seed=2)).all()
+    rate, low, high = win_rate(play_games(max_wins, hold_at(20), 20000, seed=3))
+    assert 0.5 < low < rate < high
+    results = tournament([max_wins, max_diffs, hold_at(20), clueless], 2000, seed=4)
+    assert len(results) == 6
+    assert all(0 <= low <= rate <= high <= 1 for (rate, low, high) in results.values())
+    assert results['hold_at(20)', 'clueless'][1] > 0.75
+    assert results['max_wins', 'clueless'][1] > 0.75
+    assert results['max_wins', 'hold_at(20)'][0] > 0.5
+    return "test_tournament passes"
+
+test_tournament()
+
+# show_tournament(tournament([max_wins, max_diffs, hold_at(20), hold_at(25), clueless], 10**6))
@@ -12,12 +12,14 @@ import random
 other = {1:0, 0:1}
 goal = 40
 
-def dierolls():
+# for long simulations, buffered_dierolls() in udacity_5_random.py
+# gives an equivalent stream of rolls ~5x faster
+def dierolls(rng=random):
     """
-    Generate die rolls.
+    Generate die rolls, with rng (a random.Random, to replay the same rolls).
     """
     while True:
-        yield random.randint(1, 6)
+        yield rng.randint(1, 6)
 
 def play_pig_d(A, B, dierolls=dierolls()):
     """
@@ -113,8 +115,6 @@ def strategy_d(state):
     else:
         return "roll"
 
-strategy_compare(strategy_d, hold_20_d)
-
 def hold_20_d(state):
     _, me, _, pending, double = state
     if double == "double":
@@ -154,3 +154,254 @@ def test():
     return 'test passes'
 
 test()
+
+#------------------------------------------------------------------------------
+# optimal strategy:
+# the utility of a state is the expected number of points won (or, if
+# negative, lost) by the player to move, when both players play their best.
+# * double = 2: nobody can double any more, so the only question is who wins:
+#   2 * (2*P - 1), where P is the probability of winning, as in plain pig
+# * double = 1: also, the player to move can double; the opponent then
+#   declines (the doubler gets 1 point) or accepts (the doubler plays on
+#   for 2), whichever costs the opponent less
+# * double = 'double': the opponent of the doubler is to move, and picks the
+#   better of declining (-1 point) or accepting
+
+from udacity_5_mdp import keyed_memo
+
+# at most memo_size states are kept, as in udacity_5_pig.py
+memo_size = 10**6
+
+# the player to move doesn't matter, only what each player has
+@keyed_memo(lambda state: state[1:], memo_size)
+def expected_points(state):
+    """
+    The expected points won by the player to move, if both play optimally.
+    """
+    p, me, you, pending, double = state
+    if double == "double":
+        return max(Q_d(state, action) for action in ["accept", "decline"])
+    elif me + pending >= goal:
+        return double
+    elif you >= goal:
+        return -double
+    else:
+        return max(Q_d(state, action) for action in pig_actions_d(state))
+
+def Q_d(state, action):
+    """
+    The expected points won by the player to move, for doing action in state.
+    """
+    p, me, you, pending, double = state
+    if action == "roll":
+        return (-expected_points((other[p], you, me+1, 0, double))
+                + sum(expected_points((p, me, you, pending+d, double))
+                      for d in (2, 3, 4, 5, 6))) / 6.
+    elif action == "hold":
+        return -expected_points((other[p], you, me+pending, 0, double))
+    elif action == "double":
+        return -expected_points((other[p], you, me, pending, "double"))
+    elif action == "accept":
+        return -expected_points((other[p], you, me, pending, 2))
+    elif action == "decline":
+        return -1
+    raise ValueError
+
+# the same, as a Markov decision process (see udacity_5_mdp.py)
+
+from udacity_5_mdp import MDP, expectimax
+
+def pig_d_transitions(state, action):
+    if action == "roll":
+        return [(1/6., do(action, state, iter([d]))) for d in (1, 2, 3, 4, 5, 6)]
+    return [(1, do(action, state, None))]
+
+def pig_d_terminal(state):
+    p, me, you, pending, double = state
+    if double == "double":
+        return None
+    elif me + pending >= goal:
+        return double
+    elif you >= goal:
+        return -double
+
+pig_d_mdp = MDP(pig_actions_d, pig_d_transitions, pig_d_terminal,
+                turn=lambda state: state[0], key=lambda state: state[1:])
+
+# expected_points recurses, so it only works for small goals.
+# for large ones, fill tables bottom up instead, like PigTable in
+# udacity_5_pig.py, by me+you (biggest first) and then by pending (biggest
+# first); all the cells with the same me+you are filled together.
+# both the probability of winning (for double = 2) and the expected points
+# with the cube still in the middle (double = 1) are filled at once.
+
+import numpy as np
+from functools import lru_cache
+
+# a dense (me, you, pending) table of the best actions would take goal**3
+# bytes (1GB at goal=1000). only the pending = 0 cells are kept, as P0 and
+# V0; a row of pending values is recomputed from them when a game asks for
+# it, as in PigTable, along with the best actions for that row, packed in
+# the bits of one code per pending:
+ROLL, HOLD, DOUBLE = 0, 1, 2 # when double = 1, in the lower two bits
+HOLD2 = 4                    # hold when double = 2
+ACCEPT = 8                   # accept, when the player to move doubles
+
+class DoubleTable(object):
+    """
+    The optimal strategy for pig with doubling, to the given goal and with
+    a die with the given number of sides, solved bottom up.
+    """
+    def __init__(self, goal=goal, die=6, rows=1024):
+        self.goal, self.die = goal, die
+        self.row = lru_cache(maxsize=rows)(self.row)
+        # indexed by [me+you, me], for pending = 0. a cell with you >= goal is
+        # never filled, and stays a loss: probability 0 and -1 point
+        self.DP = np.zeros((2*goal + die, goal))
+        self.DV = np.full((2*goal + die, goal), -1.)
+        for total in range(2*goal - 2, -1, -1):
+            self.fill(total)
+        me, you = np.indices((goal, goal+1))
+        self.P0, self.V0 = self.DP[me+you, me], self.DV[me+you, me]
+        del self.DP, self.DV
+
+    def fill(self, total):
+        """
+        Fill the tables for all the cells with me + you = total.
+        """
+        goal, die, DP, DV = self.goal, self.die, self.DP, self.DV
+        lo, hi = max(0, total - goal + 1), min(total, goal - 1) # range of me
+        yous = slice(total - hi, total - lo + 1) # you, for me = hi down to lo
+        # WP[pending, i], WV[pending, i]: for cell (me, you) = (hi - i, total - hi + i)
+        mes = np.arange(hi, lo - 1, -1)
+        WP = (np.arange(goal + die)[:, None] + mes >= goal).astype(float)
+        WV = WP.copy()
+        pig_outP, pig_outV = 1 - DP[total + 1, yous], -DV[total + 1, yous]
+        top = goal - lo - 1
+        windowP = WP[top+2:top+die+1].sum(axis=0) # WP[p+2:p+die+1], kept up to date
+        windowV = WV[top+2:top+die+1].sum(axis=0)
+        for p in range(top, -1, -1):
+            rows = slice(max(0, hi + p - goal + 1), None) # cells with me + p < goal
+            rollP = (pig_outP[rows] + windowP[rows]) / die
+            rollV = (pig_outV[rows] + windowV[rows]) / die
+            if p:
+                WP[p, rows] = np.maximum(1 - DP[total + p, yous][rows], rollP)
+                keep = np.maximum(-DV[total + p, yous][rows], rollV)
+            else:
+                WP[p, rows] = rollP
+                keep = rollV
+            V2 = 2 * (2*WP[p, rows] - 1)
+            doubled = np.minimum(1, V2) # the opponent declines, or accepts
+            WV[p, rows] = np.maximum(doubled, keep)
+            windowP[rows] += WP[p+1, rows] - WP[p+die, rows]
+            windowV[rows] += WV[p+1, rows] - WV[p+die, rows]
+        DP[total, lo:hi+1] = WP[0, ::-1]
+        DV[total, lo:hi+1] = WV[0, ::-1]
+
+    def row(self, me, you):
+        """
+        The probability of winning, the expected points with double = 1, and
+        the code of the best actions, for (me, you, pending), for every
+        pending with me + pending < goal.
+        """
+        goal, die, P0, V0 = self.goal, self.die, self.P0[you], self.V0[you]
+        pig_outP, pig_outV = 1 - P0[me + 1], -V0[me + 1]
+        WP, WV, codes = [1.] * die, [1.] * die, []
+        for p in range(goal - me - 1, -1, -1):
+            rollP = (pig_outP + sum(WP[-die:-1])) / die
+            rollV = (pig_outV + sum(WV[-die:-1])) / die
+            hold2 = hold1 = False
+            if p:
+                hold2, hold1 = 1 - P0[me + p] > rollP, -V0[me + p] > rollV
+            P = 1 - P0[me + p] if hold2 else rollP
+            keep = -V0[me + p] if hold1 else rollV
+            V2 = 2 * (2*P - 1)
+            doubles = min(1, V2) > keep # the opponent declines, or accepts
+            WP.append(P)
+            WV.append(min(1, V2) if doubles else keep)
+            codes.append((DOUBLE if doubles else HOLD if hold1 else ROLL)
+                         | hold2 * HOLD2 | (V2 <= 1) * ACCEPT)
+        return WP[:die-1:-1], WV[:die-1:-1], codes[::-1]
+
+    def value(self, state):
+        """
+        The expected points won by the player to move, if both play optimally.
+        """
+        p, me, you, pending, double = state
+        if double == "double":
+            # the opponent's points if we accept, or -1
+            return max(-1, -self.value((other[p], you, me, pending, 2)))
+        elif me + pending >= self.goal:
+            return double
+        elif you >= self.goal:
+            return -double
+        P, V, _ = self.row(me, you)
+        return float(V[pending] if double == 1 else 2 * (2*P[pending] - 1))
+
+    def max_points(self, state):
+        """
+        The strategy that maximizes the expected points won.
+        """
+        p, me, you, pending, double = state
+        if double == "double":
+            # the doubler's (me, you, pending) is our (you, me, pending)
+            if you + pending >= self.goal:
+                return "decline"
+            return "accept" if self.row(you, me)[2][pending] & ACCEPT else "decline"
+        elif me + pending >= self.goal:
+            return "hold"
+        code = self.row(me, you)[2][pending]
+        if double == 1:
+            return ["roll", "hold", "double"][code & 3]
+        return "hold" if code & HOLD2 else "roll"
+
+optimal_table = DoubleTable()
+
+# a plain function, so it can be sent to other processes by name
+def max_points(state):
+    return optimal_table.max_points(state)
+
+def points_against(A, B, state=(0, 0, 0, 0, 1)):
+    """
+    The expected points won by A (player 0) against B (player 1) from state,
+    exactly: like strategy_compare, but summed over every roll of the die.
+    """
+    strategies = (A, B)
+    @keyed_memo(maxsize=memo_size)
+    def U(state):
+        "The expected points won by the player to move."
+        u = pig_d_terminal(state)
+        if u is not None:
+            return u
+        return pig_d_mdp.Q(state, strategies[state[0]](state), U)
+    u = U(state)
+    return u if state[0] == 0 else -u
+
+def test_optimal():
+    epsilon = 1e-9
+    table = DoubleTable()
+    states = [(p, me, you, pending, double)
+              for p in (0, 1) for me in range(goal) for you in range(goal)
+              for pending in range(goal - me) for double in (1, 2, "double")]
+    for state in states:
+        v = expected_points(state)
+        assert abs(table.value(state) - v) <= epsilon
+        assert abs(Q_d(state, table.max_points(state)) - v) <= epsilon
+    assert table.value((0, 0, 0, 0, 1)) > 0 # going first is an edge
+    U = expectimax(pig_d_mdp)
+    assert all(abs(U(state) - expected_points(state)) <= epsilon
+               for state in [(0, 0, 0, 0, 1), (1, 30, 20, 5, 2), (0, 30, 35, 0, "double")])
+    # hold_20_d always accepts a double: strategy_d exploits that, by doubling
+    # whenever it is close to the goal; max_points expects a declining opponent,
+    # and still wins .35 points a game going first, and .20 going second
+    assert abs(points_against(max_points, max_points) - table.value((0, 0, 0, 0, 1))) <= epsilon
+    assert abs(points_against(max_points, hold_20_d) - 0.35219943529) <= epsilon
+    assert abs(points_against(hold_20_d, max_points) + 0.20004159704) <= epsilon
+    # double when well ahead
+    big = DoubleTable(200)
+    assert big.max_points((0, 0, 0, 0, 1)) == "roll"
+    assert big.max_points((0, 190, 150, 0, 1)) == "double"
+    assert big.max_points((1, 150, 190, 0, "double")) == "decline"
+    return "test_optimal passes"
+
+test_optimal()
@@ -0,0 +1,101 @@
+#------------------------------------------------------------------------------
+# fast random numbers for game simulators
+# used by:
+# udacity_5_compare.py
+#
+# dierolls() calls random.randint once per roll, and foxes and hens calls
+# random.choice once per card: a few Python calls for every random number.
+# numpy draws thousands of numbers in one call; hand them out one at a time
+# from a list, and draw the next block when the list runs out.
+#
+# numpy seeds its generators with a SeedSequence, which can spawn any number
+# of independent child sequences: one stream per worker process, all
+# reproducible from one seed.
+
+import numpy as np
+
+def buffered_dierolls(sides=6, seed=None, block=4096):
+    """
+    Generate die rolls, like dierolls(), drawn block rolls at a time.
+    """
+    rng = np.random.default_rng(seed)
+    while True:
+        yield from rng.integers(1, sides + 1, block).tolist()
+
+class BufferedRandom(object):
+    """
+    A stand-in for random.Random, for random(), randint() and choice(),
+    that draws its uniform numbers from numpy, block numbers at a time.
+    """
+    def __init__(self, seed=None, block=4096):
+        self.rng = np.random.default_rng(seed)
+        self.block = block
+        self.uniforms = iter(())
+
+    def random(self):
+        for u in self.uniforms:
+            return u
+        self.uniforms = iter(self.rng.random(self.block).tolist())
+        return next(self.uniforms)
+
+    def randint(self, a, b):
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+def streams(seed, n, block=4096):
+    """
+    n independent BufferedRandom streams, from one seed.
+    """
+    return [BufferedRandom(child, block) for child in np.random.SeedSequence(seed).spawn(n)]
+
+def child_seeds(seed):
+    """
+    Generate independent seeds, without end, from one seed: the children of
+    SeedSequence(seed), for BufferedRandom or buffered_dierolls.
+    """
+    root = np.random.SeedSequence(seed)
+    while True:
+        yield root.spawn(1)[0]
+
+#------------------------------------------------------------------------------
+# test
+
+import itertools
+
+def test():
+    rolls = list(itertools.islice(buffered_dierolls(seed=1, block=100), 6000))
+    assert set(rolls) == set([1, 2, 3, 4, 5, 6])
+    assert all(900 < rolls.count(d) < 1100 for d in range(1, 7))
+    assert rolls == list(itertools.islice(buffered_dierolls(seed=1, block=100), 6000))
+    rng = BufferedRandom(2, block=10)
+    draws = [rng.choice("FFHHH") for _ in range(1000)]
+    assert 300 < draws.count("F") < 500
+    assert all(1 <= rng.randint(1, 6) <= 6 for _ in range(1000))
+    # independent streams, and the same ones every time for the same seed
+    a, b = streams(3, 2)
+    xs, ys = [a.random() for _ in range(100)], [b.random() for _ in range(100)]
+    assert xs != ys
+    a = streams(3, 2)[0]
+    assert [a.random() for _ in range(100)] == xs
+    # the same children as streams()
+    c, d = itertools.islice(child_seeds(3), 2)
+    a = BufferedRandom(c)
+    assert [a.random() for _ in range(100)] == xs
+    assert list(itertools.islice(buffered_dierolls(seed=d), 100)) != (
+        list(itertools.islice(buffered_dierolls(seed=c), 100)))
+    return 'tests pass'
+
+test()
+
+# import random, timeit
+# def dierolls():
+#     while True:
+#         yield random.randint(1, 6)
+# rolls, fast_rolls = dierolls(), buffered_dierolls()
+# timeit.timeit(lambda: next(rolls), number=10**6)       # ~0.33s
+# timeit.timeit(lambda: next(fast_rolls), number=10**6)  # ~0.07s
+# r, b = random.Random(0), BufferedRandom(0)
+# timeit.timeit(lambda: r.choice("FFFHHHHH"), number=10**6)  # ~0.25s
+# timeit.timeit(lambda: b.choice("FFFHHHHH"), number=10**6)  # ~0.23s
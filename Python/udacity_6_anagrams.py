@@ -15,7 +15,10 @@ def readwordlist(filename):
     prefixset = set(p for word in wordset for p in prefixes(word))
     return wordset, prefixset
 
-WORDS, PREFIXES = readwordlist('words4k.txt')
+# WORDS, PREFIXES = readwordlist('words4k.txt')
+# better: one graph of nodes for both (see udacity_6_lexicon.py)
+from udacity_6_lexicon import load_lexicon, ROOT
+LEXICON = load_lexicon('words4k.txt')
 
 #------------------------------------------------------------------------------
 # read list
@@ -60,11 +63,20 @@ def removed(letters, remove):
 def find_words(letters):
     return extend_prefix('', letters, set())
 
-def extend_prefix(pre, letters, results):
-    if pre in WORDS: results.add(pre)
-    if pre in PREFIXES:
-        for L in letters:
-            extend_prefix(pre+L, removed(letters, L), results)
+# def extend_prefix(pre, letters, results):
+#     if pre in WORDS: results.add(pre)
+#     if pre in PREFIXES:
+#         for L in letters:
+#             extend_prefix(pre+L, removed(letters, L), results)
+#     return results
+# better: carry the node of pre along, and only try the letters that lead
+# somewhere from it (once each, even if a letter is in letters twice)
+def extend_prefix(pre, letters, results, node=ROOT):
+    if LEXICON.is_word(node): results.add(pre)
+    for L in set(letters):
+        child = LEXICON.child(node, L)
+        if child is not None:
+            extend_prefix(pre+L, removed(letters, L), results, child)
     return results
 
 #------------------------------------------------------------------------------
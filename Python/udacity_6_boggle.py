@@ -11,7 +11,10 @@ def readwordlist(filename):
     prefixset = set(p for word in wordset for p in prefixes(word))
     return wordset, prefixset
 
-WORDS, PREFIXES = readwordlist('words4k.txt')
+# WORDS, PREFIXES = readwordlist('words4k.txt')
+# better: one graph of nodes for both (see udacity_6_lexicon.py)
+from udacity_6_lexicon import load_lexicon
+LEXICON = load_lexicon('words4k.txt')
 
 #------------------------------------------------------------------------------
 # read dictionary
@@ -40,13 +43,27 @@ def boggle_words(board, minlength=3):
             results = results | find_words([i], v, board, results, minlength)
     return results
 
-def find_words(path, pre, board, results, minlength):
-    if pre in WORDS and len(pre) >= minlength:
+# def find_words(path, pre, board, results, minlength):
+#     if pre in WORDS and len(pre) >= minlength:
+#         results.add(pre)
+#     if pre in PREFIXES:
+#         for j in neighbors(path[-1], size(board)):
+#             if j not in path and board[j] != BORDER:
+#                 find_words(path+[j], pre+board[j], board, results, minlength)
+#     return results 
+# better: carry the node of pre along, and step to the next letter's node
+def find_words(path, pre, board, results, minlength, node=None):
+    if node is None:
+        node = LEXICON.node(pre)
+        if node is None:
+            return results
+    if LEXICON.is_word(node) and len(pre) >= minlength:
         results.add(pre)
-    if pre in PREFIXES:
-        for j in neighbors(path[-1], size(board)):
-            if j not in path and board[j] != BORDER:
-                find_words(path+[j], pre+board[j], board, results, minlength)
+    for j in neighbors(path[-1], size(board)):
+        if j not in path and board[j] != BORDER:
+            child = LEXICON.child(node, board[j])
+            if child is not None:
+                find_words(path+[j], pre+board[j], board, results, minlength, child)
     return results 
 
 #------------------------------------------------------------------------------
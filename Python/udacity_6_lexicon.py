@@ -0,0 +1,299 @@
+#------------------------------------------------------------------------------
+# lexicon: a word list as a minimized DAWG (directed acyclic word graph)
+# used by:
+# udacity_6_anagrams.py
+# udacity_6_boggle.py
+# udacity_6_word_game.py
+# udacity_6_word_game_final.py
+#
+# readwordlist() returns WORDS, plus PREFIXES: every prefix of every word as
+# a string of its own, several times the size of the word list. and every
+# step of a search builds a new string pre+L, just to look it up.
+# instead, store the words as a graph of nodes, one edge per letter:
+# * a trie shares common prefixes: 'CAR' and 'CAT' share the path C-A
+# * a DAWG also shares common suffixes, by merging nodes that have the same
+#   future: 'CARS' and 'CATS' end on the same node, from the -S edges
+# a search keeps a node along with its prefix, and steps to a child node;
+# pre is a prefix iff it has a node, and a word iff that node is final.
+#
+# the graph is flattened into 4 compact arrays (like a sparse matrix):
+# * the edges of node n are first[n] to first[n+1]-1, in alphabetical order
+# * labels[e] is the letter of edge e (all of them in one str), and
+#   targets[e] the node it leads to
+# * final[n] is 1 if the path to n spells a word
+# so finding a child is a str.find over at most 26 letters.
+#
+# save_lexicon() writes the arrays to a binary file, once; load_lexicon()
+# maps the file into memory instead of reading and building the word list
+# on every start. the operating system pages it in as the nodes are used,
+# and processes that map the same file (like forked workers) share its
+# pages. only labels is copied, into a str, for str.find: 1 byte per edge.
+#
+# a GADDAG (Gordon, "A faster Scrabble move generation algorithm", 1994) is
+# a lexicon of every word split every way: the letters before the split,
+# reversed, then SEP, then the rest. CAT is stored as C>AT, AC>T and TAC>.
+# so a search can start from any letter of a word, go left, and then turn
+# right at SEP; a word game can grow words out from a square in the middle.
+
+from array import array
+import mmap
+import os
+import tempfile
+
+ROOT = 0
+
+class Lexicon(object):
+    """
+    A set of words, as a graph of nodes numbered from ROOT = 0.
+    """
+    def __init__(self, labels, targets, first, final):
+        self.labels, self.targets, self.first, self.final = labels, targets, first, final
+
+    def child(self, node, L):
+        """
+        The node after letter L from node, or None.
+        """
+        e = self.labels.find(L, self.first[node], self.first[node+1])
+        return None if e < 0 else self.targets[e]
+
+    def children(self, node):
+        """
+        The (letter, node) pairs after node.
+        """
+        return [(self.labels[e], self.targets[e])
+                for e in range(self.first[node], self.first[node+1])]
+
+    def is_word(self, node):
+        return self.final[node] == 1
+
+    def is_prefix(self, node):
+        """
+        Is the path to node the start of a longer word?
+        """
+        return self.first[node] < self.first[node+1]
+
+    def node(self, letters, node=ROOT):
+        """
+        The node after letters from node, or None if no word starts that way.
+        """
+        for L in letters:
+            node = self.child(node, L)
+            if node is None:
+                return None
+        return node
+
+    def __contains__(self, word):
+        node = self.node(word)
+        return node is not None and self.is_word(node)
+
+    def words(self, node=ROOT, pre=''):
+        """
+        Generate the words from node, in alphabetical order.
+        """
+        if self.is_word(node):
+            yield pre
+        for (L, child) in self.children(node):
+            for word in self.words(child, pre + L):
+                yield word
+
+    def __len__(self):
+        return sum(1 for _ in self.words())
+
+# build a minimal graph in one pass over the words in sorted order
+# (Daciuk et al., "Incremental construction of minimal acyclic finite-state
+# automata", 2000): when the next word leaves the path of the previous one,
+# the nodes left behind can't change any more, so each is replaced by an
+# equal node seen before (same finality, same edges), if there is one.
+
+class Node(object):
+    __slots__ = ('final', 'edges')
+    def __init__(self):
+        self.final, self.edges = False, {}
+
+def build_lexicon(words):
+    """
+    Return a Lexicon of words.
+    """
+    root = Node()
+    register = {}  # {(final, edges): node}, the distinct nodes
+    unchecked = [] # [(parent, letter, child)] along the previous word
+    def minimize(depth):
+        while len(unchecked) > depth:
+            parent, L, child = unchecked.pop()
+            signature = (child.final, tuple((L2, id(c)) for (L2, c) in sorted(child.edges.items())))
+            if signature in register:
+                parent.edges[L] = register[signature]
+            else:
+                register[signature] = child
+    previous = ''
+    for word in sorted(set(words)):
+        common = 0
+        while common < min(len(word), len(previous)) and word[common] == previous[common]:
+            common += 1
+        minimize(common)
+        node = unchecked[-1][2] if unchecked else root
+        for L in word[common:]:
+            child = node.edges[L] = Node()
+            unchecked.append((node, L, child))
+            node = child
+        node.final = True
+        previous = word
+    minimize(0)
+    return flatten(root)
+
+def flatten(root):
+    """
+    Number the nodes from root (breadth first), and pack their edges into
+    a Lexicon's arrays.
+    """
+    ids, order = {id(root): ROOT}, [root]
+    labels, targets, first, final = [], array('I'), array('I'), bytearray()
+    for node in order: # order grows as we go
+        first.append(len(targets))
+        final.append(node.final)
+        for L in sorted(node.edges):
+            child = node.edges[L]
+            if id(child) not in ids:
+                ids[id(child)] = len(order)
+                order.append(child)
+            labels.append(L)
+            targets.append(ids[id(child)])
+    first.append(len(targets))
+    return Lexicon(''.join(labels), targets, first, final)
+
+def read_lexicon(filename, gaddag=False):
+    """
+    A Lexicon of all the words in a file. (Uppercased.)
+    If gaddag, of all their GADDAG paths instead.
+    """
+    words = open(filename).read().upper().split()
+    if gaddag:
+        words = [path for word in words for path in gaddag_paths(word)]
+    return build_lexicon(words)
+
+SEP = '>'
+
+def gaddag_paths(word):
+    """
+    The GADDAG paths of word, e.g. ['C>AT', 'AC>T', 'TAC>'] for 'CAT'.
+    """
+    return [word[i-1::-1] + SEP + word[i:] for i in range(1, len(word) + 1)]
+
+# the file: a header of 4 unsigned ints (MAGIC, version, nodes, edges),
+# then first and targets (unsigned ints), then final and labels (bytes),
+# all in the machine's byte order: a file from a machine with the other
+# order doesn't start with MAGIC, and is rebuilt.
+MAGIC, VERSION = 0x47574144, 1 # 'DAWG'
+HEADER = 16
+
+def lexicon_file(wordfile, gaddag=False):
+    return os.path.splitext(wordfile)[0] + ('.gaddag' if gaddag else '.dawg')
+
+def save_lexicon(lexicon, filename):
+    """
+    Write lexicon's arrays to filename, under a temporary name and then
+    renamed, so a process loading it never sees a partial file.
+    """
+    nodes, edges = len(lexicon.final), len(lexicon.targets)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(filename) or '.', suffix='.dawg')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(array('I', [MAGIC, VERSION, nodes, edges]).tobytes())
+        f.write(array('I', lexicon.first).tobytes())
+        f.write(array('I', lexicon.targets).tobytes())
+        f.write(bytes(lexicon.final))
+        f.write(lexicon.labels.encode('ascii'))
+    os.replace(tmp, filename)
+
+def map_lexicon(filename):
+    """
+    The Lexicon saved in filename, memory-mapped; None if the file isn't
+    one that save_lexicon() wrote.
+    """
+    # too short for a header (mmap can't map an empty file at all)
+    if os.path.getsize(filename) < HEADER:
+        return None
+    with open(filename, 'rb') as f:
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(m)
+    magic, version, nodes, edges = view[:HEADER].cast('I')
+    size = HEADER + 4*(nodes + 1) + 4*edges + nodes + edges
+    if magic != MAGIC or version != VERSION or len(m) != size:
+        return None
+    i = HEADER
+    first = view[i:i + 4*(nodes + 1)].cast('I'); i += 4*(nodes + 1)
+    targets = view[i:i + 4*edges].cast('I'); i += 4*edges
+    final = view[i:i + nodes]; i += nodes
+    labels = m[i:i + edges].decode('ascii')
+    return Lexicon(labels, targets, first, final)
+
+def load_lexicon(wordfile, filename=None, gaddag=False):
+    """
+    The Lexicon (or GADDAG) of wordfile, mapped from filename (by default,
+    wordfile with the extension .dawg or .gaddag), which is built first if
+    it is missing, older than wordfile, or not a lexicon file.
+    """
+    filename = filename or lexicon_file(wordfile, gaddag)
+    if (os.path.exists(filename) and
+        os.path.getmtime(filename) >= os.path.getmtime(wordfile)):
+        lexicon = map_lexicon(filename)
+        if lexicon is not None:
+            return lexicon
+    save_lexicon(read_lexicon(wordfile, gaddag), filename)
+    return map_lexicon(filename)
+
+#------------------------------------------------------------------------------
+# test
+
+def test():
+    lex = build_lexicon(['CAT', 'CATS', 'CAR', 'CARS', 'DOG', 'DOGS', 'A'])
+    assert list(lex.words()) == ['A', 'CAR', 'CARS', 'CAT', 'CATS', 'DOG', 'DOGS']
+    assert 'CATS' in lex and 'CA' not in lex and 'COW' not in lex and '' not in lex
+    ca = lex.node('CA')
+    assert lex.is_prefix(ca) and not lex.is_word(ca)
+    assert [L for (L, _) in lex.children(ca)] == ['R', 'T']
+    assert lex.child(ca, 'X') is None
+    # suffixes are shared: CAR, CAT and DOG all lead to the same node,
+    # where S ends a word
+    assert lex.node('CAR') == lex.node('CAT') == lex.node('DOG')
+    # 7 nodes: root, C, CA, D, DO, CAR/CAT/DOG, and A/CARS/CATS/DOGS
+    # (a final node with no edges), where a trie has 12
+    assert len(lex.final) == 7
+    # the same words and prefixes as the set pair
+    words = set(open('words4k.txt').read().upper().split())
+    lex = load_lexicon('words4k.txt')
+    assert set(lex.words()) == words and len(lex) == len(words)
+    prefixes = set(w[:i] for w in words for i in range(len(w)))
+    assert all(lex.is_prefix(lex.node(p)) for p in prefixes)
+    starts = prefixes | words
+    assert not any(lex.node(w + L) for w in words for L in 'QXZ' if w + L not in starts)
+    # saved and memory-mapped
+    with tempfile.TemporaryDirectory() as dirname:
+        wordfile = os.path.join(dirname, 'words.txt')
+        with open(wordfile, 'w') as f:
+            f.write('cat cats car cars dog dogs a')
+        mapped = load_lexicon(wordfile)
+        assert os.path.exists(os.path.join(dirname, 'words.dawg'))
+        assert isinstance(mapped.targets, memoryview)
+        assert list(mapped.words()) == ['A', 'CAR', 'CARS', 'CAT', 'CATS', 'DOG', 'DOGS']
+        assert mapped.node('CAR') == mapped.node('DOG') and 'CA' not in mapped
+        # a changed word list is rebuilt; so is a file that isn't a lexicon
+        with open(wordfile, 'w') as f:
+            f.write('cow')
+        os.utime(wordfile, (0, os.path.getmtime(lexicon_file(wordfile)) + 1))
+        assert list(load_lexicon(wordfile).words()) == ['COW']
+        with open(lexicon_file(wordfile), 'wb') as f:
+            f.write(b'not a lexicon')
+        assert list(load_lexicon(wordfile).words()) == ['COW']
+        # or an empty one
+        open(lexicon_file(wordfile), 'wb').close()
+        assert map_lexicon(lexicon_file(wordfile)) is None
+        assert list(load_lexicon(wordfile).words()) == ['COW']
+        # a GADDAG: from O, left to C, then right to W
+        gaddag = load_lexicon(wordfile, gaddag=True)
+        assert os.path.exists(os.path.join(dirname, 'words.gaddag'))
+        assert sorted(gaddag.words()) == ['C>OW', 'OC>W', 'WOC>']
+        assert gaddag.is_word(gaddag.node('OC>W'))
+        assert gaddag.child(gaddag.node('OC'), SEP) is not None
+    return 'tests pass'
+
+test()
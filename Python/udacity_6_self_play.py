@@ -0,0 +1,185 @@
+#------------------------------------------------------------------------------
+# self-play for the word game
+# used with:
+# udacity_6_word_game_final.py
+#
+# show_best() and test() look for one play on one board. to see how a move
+# generator does over whole games, and how fast, play games against itself:
+# * deal 7 tiles to each player from a bag, and refill after every play
+# * a strategy(hand, board) picks a play (or NOPLAY to pass) on a Board,
+#   which keeps its anchors up to date as the plays are made
+# * the game ends when the bag is empty and a player has no tiles left, or
+#   when every player has passed twice in a row
+# * play many games in worker processes, each game from its own seed
+#
+# the lexicon and GADDAG are memory-mapped when udacity_6_word_game_final is
+# imported, from files built once; forked workers inherit the mappings, and
+# other workers map the same files, so they all share one copy of the pages.
+
+import pickle
+import random
+import time
+from statistics import mean, stdev
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from udacity_6_word_game_final import Board, BONUS, NOPLAY, is_letter
+
+# the letters in a bag of Scrabble tiles: 100, with 2 blanks
+TILES = ('A'*9 + 'B'*2 + 'C'*2 + 'D'*4 + 'E'*12 + 'F'*2 + 'G'*3 + 'H'*2 + 'I'*9 +
+         'J' + 'K' + 'L'*4 + 'M'*2 + 'N'*6 + 'O'*8 + 'P'*2 + 'Q' + 'R'*6 + 'S'*4 +
+         'T'*6 + 'U'*4 + 'V'*2 + 'W'*2 + 'X' + 'Y'*2 + 'Z' + '_'*2)
+HAND_SIZE = 7
+
+def empty_board(bonus=BONUS):
+    "The squares of an empty board, with '*' for the starting square."
+    return [[sq if sq in '|*' else '.' for sq in row] for row in bonus]
+
+# strategies
+
+def best_strategy(hand, board):
+    "The highest-scoring play."
+    return board.best_play(hand)
+
+def most_tiles_strategy(hand, board):
+    "The play that uses the most tiles; of those, the highest-scoring."
+    plays = board.all_plays(hand)
+    if not plays:
+        return NOPLAY
+    return max(plays, key=lambda play: (len(tiles_played(play, board)), play))
+
+def tiles_played(play, board):
+    "The tiles that play takes from the hand, with '_' for a blank."
+    (score, (i, j), (di, dj), word) = play
+    return ''.join('_' if L.islower() else L
+                   for (n, L) in enumerate(word)
+                   if not is_letter(board.squares[j + n*dj][i + n*di]))
+
+def removed(letters, remove):
+    "Return a str of letters, but with each letter in remove removed once."
+    for L in remove:
+        letters = letters.replace(L, '', 1)
+    return letters
+
+# games
+
+def play_game(strategies, seed):
+    """
+    Play a game between strategies (the first one plays first), with the
+    tiles shuffled by seed.
+    Return (scores, latencies, board): each player's score, the seconds each
+    move took to pick, and the final Board.
+    """
+    bag = list(TILES)
+    random.Random(seed).shuffle(bag)
+    board = Board(empty_board())
+    hands = []
+    for _ in strategies:
+        hands.append(''.join(bag[-HAND_SIZE:]))
+        del bag[-HAND_SIZE:]
+    scores = [0] * len(strategies)
+    latencies = []
+    passes = 0
+    p = 0
+    while passes < 2 * len(strategies):
+        t0 = time.perf_counter()
+        play = strategies[p](hands[p], board)
+        latencies.append(time.perf_counter() - t0)
+        if play is NOPLAY:
+            passes += 1
+        else:
+            passes = 0
+            tiles = tiles_played(play, board)
+            board.make_play(play)
+            scores[p] += play[0]
+            hand = removed(hands[p], tiles)
+            drawn = len(bag) - min(HAND_SIZE - len(hand), len(bag))
+            hands[p] = hand + ''.join(bag[drawn:])
+            del bag[drawn:]
+            if not hands[p] and not bag:
+                break
+        p = (p + 1) % len(strategies)
+    return scores, latencies, board
+
+def play_games(strategies, seeds):
+    "The (scores, latencies) of a game for each seed."
+    return [play_game(strategies, seed)[:2] for seed in seeds]
+
+def self_play(strategies, games=100, workers=4, executor=None, seed=0, batch=5):
+    """
+    Play games between strategies, seeds counting up from seed, batch games
+    at a time in each of workers processes.
+    Return a summary(), as a dict.
+    """
+    if executor is None:
+        with ProcessPoolExecutor(workers) as executor:
+            return self_play(strategies, games, workers, executor, seed, batch)
+    t0 = time.perf_counter()
+    batches = [range(s, min(s + batch, seed + games)) for s in range(seed, seed + games, batch)]
+    results = []
+    for result in executor.map(play_games, [strategies] * len(batches), batches):
+        results.extend(result)
+    return summary(results, time.perf_counter() - t0)
+
+def percentile(xs, p):
+    "The p-th percentile of the sorted list xs (nearest rank)."
+    return xs[min(len(xs) - 1, max(0, int(round(p / 100. * len(xs))) - 1))]
+
+def summary(results, seconds):
+    """
+    Summarize the (scores, latencies) of games that took seconds to play:
+    throughput, each player's scores, and the latency of a move.
+    """
+    latencies = sorted(t for (_, ts) in results for t in ts)
+    players = list(zip(*[scores for (scores, _) in results]))
+    return {
+        'games': len(results),
+        'moves': len(latencies),
+        'seconds': seconds,
+        'moves_per_second': len(latencies) / seconds,
+        'scores': [{'mean': mean(s), 'stdev': stdev(s) if len(s) > 1 else 0.,
+                    'min': min(s), 'median': percentile(sorted(s), 50), 'max': max(s)}
+                   for s in players],
+        'wins': [sum(scores[k] > max(scores[:k] + scores[k+1:]) for (scores, _) in results)
+                 for k in range(len(players))],
+        'latency': {'p50': percentile(latencies, 50), 'p90': percentile(latencies, 90),
+                    'p99': percentile(latencies, 99), 'max': latencies[-1]}}
+
+#------------------------------------------------------------------------------
+# test
+
+def test():
+    assert len(TILES) == 100
+    assert percentile([1, 2, 3, 4], 50) == 2 and percentile([1, 2, 3, 4], 99) == 4
+    strategies = [best_strategy, most_tiles_strategy]
+    scores, latencies, board = play_game(strategies, 1)
+    # the same seed plays the same game
+    assert play_game(strategies, 1)[0] == scores
+    # every play was legal, so the board is the same as one built from scratch
+    fresh = Board(board.squares)
+    assert board.checks == fresh.checks
+    placed = [sq for row in board.squares for sq in row if is_letter(sq)]
+    assert 0 < len(placed) <= len(TILES) and all(s > 0 for s in scores)
+    assert sum(L.islower() for L in placed) <= TILES.count('_')
+    assert len(latencies) >= len(placed) / float(HAND_SIZE)
+    return 'tests pass'
+
+test()
+
+def test_parallel(executor):
+    strategies = [best_strategy, most_tiles_strategy]
+    # the strategies go to the workers by name, like play_games
+    assert pickle.loads(pickle.dumps(strategies)) == strategies
+    report = self_play(strategies, games=4, workers=2, executor=executor, batch=1)
+    assert report['games'] == 4 and report['moves'] > 4 * 10
+    assert report['moves_per_second'] > 0
+    assert report['latency']['p50'] <= report['latency']['p90'] <= report['latency']['max']
+    assert sum(report['wins']) <= 4
+    return 'test_parallel passes'
+
+# threads at import, processes as a script: see udacity_4_search.py
+with ThreadPoolExecutor(2) as executor:
+    test_parallel(executor)
+
+if __name__ == '__main__':
+    with ProcessPoolExecutor(2) as executor:
+        test_parallel(executor)
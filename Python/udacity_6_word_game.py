@@ -15,10 +15,14 @@ def readwordlist(filename):
     and a set of the prefixes.
     """
     wordset = set(open(filename).read().upper().split())
-	prefixset = set(i for word in wordset for i in prefixes(word))
+    prefixset = set(i for word in wordset for i in prefixes(word))
     return wordset, prefixset
     
-WORDS, PREFIXES = readwordlist("words4k.txt")
+# WORDS, PREFIXES = readwordlist("words4k.txt")
+# better: one graph of nodes for both (see udacity_6_lexicon.py); a search
+# carries the node of its prefix along, and steps to the next letter's node
+from udacity_6_lexicon import load_lexicon, ROOT
+LEXICON = load_lexicon("words4k.txt")
 
 POINTS = dict(
     A=1, B=3, C=3, D=2, E=1, F=4, G=2, H=4, I=1, J=8, K=5, L=1, M=3, N=1, 
@@ -29,12 +33,13 @@ POINTS = dict(
 
 # recursively, for each L in letters:
 # add each remainder (letter.replace(L, "", 1)) to it and check
-def find_words(letters, pre="", results=None):
-	if results is None: results = set()
-    if pre in WORDS: results.add(pre)
-    if pre in PREFIXES:
-        for L in letters:
-        	find_words(letters.replace(L, "", 1), pre+L, results)
+def find_words(letters, pre="", results=None, node=ROOT):
+    if results is None: results = set()
+    if LEXICON.is_word(node): results.add(pre)
+    for L in letters:
+        child = LEXICON.child(node, L)
+        if child is not None:
+            find_words(letters.replace(L, "", 1), pre+L, results, child)
     return results
 
 #------------------------------------------------------------------------------
@@ -43,32 +48,37 @@ def find_words(letters, pre="", results=None):
 # Find prefix + L + suffix, where L from board_letters, rest from hand
 def word_plays(hand, board_letters):
     results = set()
-    for pre in find_prefixes(hand, '', set()):
+    for pre in find_prefixes(hand):
         for L in board_letters:
             add_suffixes(removed(hand, pre), pre+L, results)
     return results
 
 # similar to find_words, but only adds prefixes
-def find_prefixes(hand, pre='', results=None):
+def find_prefixes(hand, pre='', results=None, node=ROOT):
     """
     Find all prefixes (of words) that can be made from letters in hand.
     """
     if results is None: results = set()
-    if pre in PREFIXES:
+    if LEXICON.is_prefix(node):
         results.add(pre)
         for L in hand:
-            find_prefixes(removed(hand, L), pre+L, results)
+            child = LEXICON.child(node, L)
+            if child is not None:
+                find_prefixes(removed(hand, L), pre+L, results, child)
     return results
 
-def add_suffixes(hand, pre, results):
+def add_suffixes(hand, pre, results, node=None):
     """
     Return the set of words that can be formed by extending pre with letters in hand.
     """
     if results is None: results = set()
-    if pre in WORDS: results.add(pre)
-    if pre in PREFIXES:
-        for L in hand:
-            find_prefixes(removed(hand, L), pre+L, results)
+    if node is None: node = LEXICON.node(pre)
+    if node is None: return results
+    if LEXICON.is_word(node): results.add(pre)
+    for L in hand:
+        child = LEXICON.child(node, L)
+        if child is not None:
+            add_suffixes(removed(hand, L), pre+L, results, child)
     return results
 
 def removed(letters, remove):
@@ -134,6 +144,7 @@ def row_plays(hand, row):
     """
     Return a set of legal plays in a row. A row play is an (i, "WORD") pair
     """
+    results = set()
     for (i, sq) in enumerate(row[1:-1], 1):
         if isinstance(sq, anchor):
             pre, maxsize = legal_prefix(i, row)
@@ -142,11 +153,12 @@ def row_plays(hand, row):
                 add_suffixes(hand, pre, start, row, results, 
                     anchored=False)
             else:
-                for pre in find_prefixes(hand):
+                prefixes = find_prefixes(hand)
+                for pre in prefixes:
                     if len(pre) <= maxsize:
                         start = i - len(pre)
                         add_suffixes(removed(hand, pre), pre, start, row, results, 
-                            anchored=False)
+                            anchored=False, node=prefixes[pre])
     return results
 
 # example: legal_prefix(9, a_row) == ('BE', 2); for 6, ('', 2)
@@ -170,22 +182,28 @@ def legal_prefix(i, row):
 # else if pre is a prefix:
 # * if there's a letter at i, add the letter
 # * else go through possibilities
-def add_suffixes(hand, pre, start, row, results, anchored=True):
+def add_suffixes(hand, pre, start, row, results, anchored=True, node=None):
     """
     Add all possible suffixes, and accumulate (start, word) pairs in results
     """
+    if node is None: node = LEXICON.node(pre)
+    if node is None: return results
     i = start + len(pre)
-    if pre in WORDS and anchored and not is_letter(row[i]):
+    if LEXICON.is_word(node) and anchored and not is_letter(row[i]):
         results.add((start, pre))
-    if pre in PREFIXES:       
-        sq = row[i]
-        if is_letter(sq):
-            add_suffixes(hand, pre+sq, start, row, results)        
-        elif is_empty(sq):        
-            possibilities = sq if isinstance(sq, set) else ANY
-            for L in hand:
-                if L in possibilities:
-                    add_suffixes(hand.replace(L, '', 1), pre+L, start, row, results)
+    sq = row[i]
+    if is_letter(sq):
+        child = LEXICON.child(node, sq)
+        if child is not None:
+            add_suffixes(hand, pre+sq, start, row, results, node=child)
+    elif is_empty(sq):        
+        possibilities = sq if isinstance(sq, set) else ANY
+        for L in hand:
+            if L in possibilities:
+                child = LEXICON.child(node, L)
+                if child is not None:
+                    add_suffixes(hand.replace(L, '', 1), pre+L, start, row, results,
+                        node=child)
     return results
 
 # in row_plays(), find_prefixes() gets called in every loop, which is slow
@@ -193,17 +211,19 @@ def add_suffixes(hand, pre, start, row, results, anchored=True):
 # find_prefixes() returns both prefixes and words, since:
 # * the "pivot" between pre/suff is an anchor, not letter
 # * thus, you can go without suffix to form a word
-prev_hand, prev_results = "", set()
-def find_prefixes(hand, pre="", results=None):
+# results is a dict {prefix: node}, so add_suffixes() can go on from the node
+prev_hand, prev_results = "", {}
+def find_prefixes(hand, pre="", results=None, node=ROOT):
     global prev_hand, prev_results
     if hand == prev_hand: return prev_results
-    if results is None: results = set()
+    if results is None: results = {}
     # at the root of recursion, cache results
     if pre == "": prev_hand, prev_results = hand, results
-    if pre in WORDS or pre in PREFIXES: results.add(pre)
-    if pre in PREFIXES:
-        for L in hand:
-            find_prefixes(hand.replace(L, "", 1), pre+L, results)
+    results[pre] = node
+    for L in hand:
+        child = LEXICON.child(node, L)
+        if child is not None:
+            find_prefixes(hand.replace(L, "", 1), pre+L, results, child)
     return results
 
 #------------------------------------------------------------------------------
@@ -245,7 +265,7 @@ def set_anchors(row, j, board):
         if sq == '*' or (is_empty(sq) and any(map(is_letter, neighborlist))):    
             if is_letter(N) or is_letter(S):   
                 _, w = find_cross_word(board, i, j)
-                row[i] = anchor(L for L in LETTERS if w.replace('.', L) in WORDS)
+                row[i] = anchor(L for L in LETTERS if w.replace('.', L) in LEXICON)
             else:
                 row[i] = ANY
 
@@ -390,9 +410,9 @@ def show(board):
 
 def timedcall(fn, *args):
     "Call function with args; return the time in seconds and result."
-    t0 = time.clock()
+    t0 = time.perf_counter()
     result = fn(*args)
-    t1 = time.clock()
+    t1 = time.perf_counter()
     return t1-t0, result
 
 # regression test
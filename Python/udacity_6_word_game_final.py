@@ -45,8 +45,10 @@ LETTERS = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
 LOWER_LETTERS = list(map(str.lower, LETTERS))
 ANY = anchor(LETTERS) # The anchor that can be any letter
 
+# a blank played on the board is a lowercase letter: still a letter
+BOARD_LETTERS = frozenset(LETTERS + LOWER_LETTERS)
 def is_letter(sq):
-    return isinstance(sq, str) and sq in LETTERS
+    return isinstance(sq, str) and sq in BOARD_LETTERS
 
 def is_empty(sq):
     "Is this an empty square (no letters, but a valid position on board)."
@@ -71,7 +73,12 @@ def readwordlist(filename):
     prefixset = set(p for word in wordset for p in prefixes(word))
     return wordset, prefixset
 
-WORDS, PREFIXES = readwordlist('words4k.txt')
+# WORDS, PREFIXES = readwordlist('words4k.txt')
+# better: one graph of nodes for both (see udacity_6_lexicon.py); a search
+# carries the node of its prefix along, and steps to the next letter's node
+from udacity_6_lexicon import load_lexicon, ROOT, SEP
+LEXICON = load_lexicon('words4k.txt')
+GADDAG = load_lexicon('words4k.txt', gaddag=True)
 
 #------------------------------------------------------------------------------
 # general utilites
@@ -103,10 +110,15 @@ def make_play(play, board):
 NOPLAY = None
 ACROSS, DOWN = (1, 0), (0, 1) # Directions that words can go
 
+# def best_play(hand, board):
+#     "Return the highest-scoring play.  Or None."
+#     plays = all_plays(hand, board)
+#     return sorted(plays)[-1] if plays else NOPLAY
+# better: generate each legal play once, from a GADDAG (see 4, below)
 def best_play(hand, board):
     "Return the highest-scoring play.  Or None."
-    plays = all_plays(hand, board)
-    return sorted(plays)[-1] if plays else NOPLAY
+    plays = gaddag_plays(hand, board)
+    return max(plays) if plays else NOPLAY
 
 def all_plays(hand, board):
     """All plays in both directions. A play is a (score, pos, dir, word) tuple,
@@ -143,7 +155,7 @@ def set_anchors(row, j, board):
             if is_letter(N) or is_letter(S):   
                 # Find letters that fit with the cross (vertical) word
                 (j2, w) = find_cross_word(board, i, j)
-                row[i] = anchor(L for L in LETTERS if w.replace('.', L) in WORDS)
+                row[i] = anchor(L for L in LETTERS if w.upper().replace('.', L) in LEXICON)
             else: # Unrestricted empty square -- any letter will fit.
                 row[i] = ANY
 
@@ -182,11 +194,12 @@ def row_plays(hand, row):
                 start = i - len(pre)
                 add_suffixes(hand, pre, start, row, results, anchored=False)
             else: ## Empty to left: go through the set of all possible prefixes
-                for pre in find_prefixes(hand):
+                prefixes = find_prefixes(hand)
+                for pre in prefixes:
                     if len(pre) <= maxsize:
                         start = i - len(pre)
                         add_suffixes(removed(hand, pre), pre, start, row, results,
-                                     anchored=False)
+                                     anchored=False, node=prefixes[pre])
     return results
 
 def legal_prefix(i, row):
@@ -201,46 +214,56 @@ def legal_prefix(i, row):
     while is_empty(row[s-1]) and not isinstance(row[s-1], set): s -= 1
     return ('', i-s)
 
-def add_suffixes(hand, pre, start, row, results, anchored=True):
+# node is the lexicon node of pre.upper(); if not given, walk to it
+def add_suffixes(hand, pre, start, row, results, anchored=True, node=None):
     "Add all possible suffixes, and accumulate (start, word) pairs in results."
+    if node is None: node = LEXICON.node(pre.upper())
+    if node is None: return results
     i = start + len(pre)
-    PRE = pre.upper()
-    if PRE in WORDS and anchored and not is_letter(row[i]):
+    if LEXICON.is_word(node) and anchored and not is_letter(row[i]):
         results.add((start, pre))
-    if PRE in PREFIXES:       
-        sq = row[i]
-        if is_letter(sq):
-            add_suffixes(hand, pre+sq, start, row, results)        
-        elif is_empty(sq):        
-            possibilities = sq if isinstance(sq, set) else ANY
-            # check the hand first
-            for L in hand:
-                if L in possibilities:
-                    add_suffixes(hand.replace(L, '', 1), pre+L, start, row, results)
-            # then, use "_" if avaiable
-            if "_" in hand:
-                for C in possibilities:
-                    add_suffixes(hand.replace("_", "", 1), pre+C.lower(), start, row, results)
+    sq = row[i]
+    if is_letter(sq):
+        child = LEXICON.child(node, sq.upper())
+        if child is not None:
+            add_suffixes(hand, pre+sq, start, row, results, node=child)
+    elif is_empty(sq):        
+        possibilities = sq if isinstance(sq, set) else ANY
+        # check the hand first
+        for L in hand:
+            if L in possibilities:
+                child = LEXICON.child(node, L)
+                if child is not None:
+                    add_suffixes(hand.replace(L, '', 1), pre+L, start, row, results,
+                                 node=child)
+        # then, use "_" if avaiable: only for the letters that lead somewhere
+        if "_" in hand:
+            for (C, child) in LEXICON.children(node):
+                if C in possibilities:
+                    add_suffixes(hand.replace("_", "", 1), pre+C.lower(), start, row, results,
+                                 node=child)
     return results
 
-prev_hand, prev_results = '', set() 
-def find_prefixes(hand, pre='', results=None):
+# results is a dict {prefix: node}, so add_suffixes() can go on from the node
+prev_hand, prev_results = '', {}
+def find_prefixes(hand, pre='', results=None, node=ROOT):
     ## Cache the most recent full hand (don't cache intermediate results)
     global prev_hand, prev_results
     if hand == prev_hand: return prev_results
-    if results is None: results = set()
+    if results is None: results = {}
     if pre == '': prev_hand, prev_results = hand, results
     # Now do the computation
-    PRE = pre.upper()
-    if PRE in WORDS or PRE in PREFIXES: results.add(pre)
-    if PRE in PREFIXES:
-        for L in hand:
-            # for wildcard: check each lower letter, recursively for each _
-            if L == "_":
-                for C in LOWER_LETTERS:
-                    find_prefixes(hand.replace("_", "", 1), pre+C, results)
-            else:
-                find_prefixes(hand.replace(L, '', 1), pre+L, results)
+    results[pre] = node
+    for L in hand:
+        # for wildcard: check each lower letter, recursively for each _
+        # better: only the letters that lead somewhere from node
+        if L == "_":
+            for (C, child) in LEXICON.children(node):
+                find_prefixes(hand.replace("_", "", 1), pre+C.lower(), results, child)
+        else:
+            child = LEXICON.child(node, L)
+            if child is not None:
+                find_prefixes(hand.replace(L, '', 1), pre+L, results, child)
     return results
 
 #------------------------------------------------------------------------------
@@ -271,6 +294,252 @@ def cross_word_score(board, L, pos, direction):
     (j2, word) = find_cross_word(board, i, j)
     return calculate_score(board, (i, j2), DOWN, L, word.replace('.', L))    
 
+#------------------------------------------------------------------------------
+# 4: GADDAG move generation
+
+# all_plays() has costs that don't depend on the hand:
+# * vertical plays are found on a transposed copy of the whole board
+# * set_anchors() tries all 26 letters in each cross word, every time
+# * row_plays() tries every prefix of the hand at every anchor, even where
+#   the board next to the anchor rules most of them out
+# instead, for each anchor, in each direction, follow a GADDAG path: put a
+# letter on the anchor, grow the word to the left (over board letters, or
+# onto empty squares that are not anchors), then turn at SEP and grow it to
+# the right. the board and the GADDAG constrain every step, so each legal
+# play is found once: from the leftmost anchor it covers.
+
+def find_word(board, i, j, direction):
+    """Find the word along direction through board[j][i], with '.' for the
+    square if it's empty. Return ((i2, j2), w), where (i2, j2) is its start."""
+    di, dj = direction
+    sq = board[j][i]
+    w = sq if is_letter(sq) else '.'
+    while is_letter(board[j-dj][i-di]):
+        i, j = i-di, j-dj
+        w = board[j][i] + w
+    (i2, j2) = (i, j)
+    i, j = i + di*len(w), j + dj*len(w)
+    while is_letter(board[j][i]):
+        w += board[j][i]
+        i, j = i+di, j+dj
+    return ((i2, j2), w)
+
+# cross-checks: the letters that fit in a cross word, cached by the cross
+# word ('AB.D'), so after make_play only the new cross words are looked up
+CROSS_CHECKS = {}
+def cross_check(w):
+    "An anchor of the letters that fill the '.' in w to make a word."
+    if w not in CROSS_CHECKS:
+        pre, suf = w.upper().split('.')
+        node = LEXICON.node(pre)
+        letters = []
+        for (L, child) in (LEXICON.children(node) if node is not None else []):
+            end = LEXICON.node(suf, child)
+            if end is not None and LEXICON.is_word(end):
+                letters.append(L)
+        CROSS_CHECKS[w] = anchor(letters)
+    return CROSS_CHECKS[w]
+
+def is_anchor(board, i, j):
+    sq = board[j][i]
+    return sq == '*' or (is_empty(sq) and any(map(is_letter, neighbors(board, i, j))))
+
+def anchored_line(board, squares, direction):
+    """The squares of board (a row, for ACROSS), as a row for
+    gaddag_row_plays(): anchors are replaced by their cross-checks and other
+    empty squares by '.'."""
+    other = DOWN if direction == ACROSS else ACROSS
+    line = []
+    for (i, j) in squares:
+        sq = board[j][i]
+        if is_empty(sq) and is_anchor(board, i, j):
+            (_, w) = find_word(board, i, j, other)
+            sq = cross_check(w) if len(w) > 1 else ANY
+        elif is_empty(sq):
+            sq = '.'
+        line.append(sq)
+    return line
+
+def gaddag_plays(hand, board):
+    """All plays in both directions, like all_plays(): a set of
+    (score, pos, dir, word) tuples."""
+    results = set()
+    rows, columns = range(len(board)), range(len(board[0]))
+    for direction in (ACROSS, DOWN):
+        lines = ([[(i, j) for i in columns] for j in rows[1:-1]] if direction == ACROSS else
+                 [[(i, j) for j in rows] for i in columns[1:-1]])
+        for squares in lines:
+            for (n, word) in gaddag_row_plays(hand, anchored_line(board, squares, direction)):
+                pos = squares[n]
+                results.add((score_play(board, pos, direction, word), pos, direction, word))
+    return results
+
+def gaddag_row_plays(hand, row):
+    """Like row_plays(): a set of (start, word) plays in row, where
+    anchors are sets of the letters that fit there."""
+    results = set()
+    for (a, sq) in enumerate(row):
+        if isinstance(sq, set):
+            grow_left(hand, a, a, '', row, results, ROOT)
+    return results
+
+def gaddag_steps(hand, sq, node):
+    """The ways to go on from node over square sq: (letter, node, hand)
+    triples. A blank ('_') plays as a lowercase letter."""
+    if is_letter(sq):
+        child = GADDAG.child(node, sq.upper())
+        return [(sq, child, hand)] if child is not None else []
+    if not is_empty(sq):
+        return []
+    possibilities = sq if isinstance(sq, set) else ANY
+    steps = []
+    for L in set(hand):
+        if L in possibilities:
+            child = GADDAG.child(node, L)
+            if child is not None:
+                steps.append((L, child, hand.replace(L, '', 1)))
+    if '_' in hand:
+        for (C, child) in GADDAG.children(node):
+            if C in possibilities:
+                steps.append((C.lower(), child, hand.replace('_', '', 1)))
+    return steps
+
+def grow_left(hand, a, i, word, row, results, node):
+    """Go on from node with row[i], left of (or on) anchor a; word is
+    row[i+1:a+1] as played so far."""
+    for (L, child, rest) in gaddag_steps(hand, row[i], node):
+        w = L + word
+        if not is_letter(row[i-1]): # the word can start here
+            turn = GADDAG.child(child, SEP)
+            if turn is not None:
+                if GADDAG.is_word(turn) and not is_letter(row[a+1]):
+                    results.add((i, w))
+                grow_right(rest, i, a+1, w, row, results, turn)
+        if is_letter(row[i-1]) or row[i-1] == '.':
+            grow_left(rest, a, i-1, w, row, results, child)
+
+def grow_right(hand, start, i, word, row, results, node):
+    "Go on from node with row[i]; word is row[start:i] as played so far."
+    for (L, child, rest) in gaddag_steps(hand, row[i], node):
+        w = word + L
+        if GADDAG.is_word(child) and not is_letter(row[i+1]):
+            results.add((start, w))
+        grow_right(rest, start, i+1, w, row, results, child)
+
+def score_play(board, pos, direction, word):
+    """Like calculate_score(), for either direction without transposing,
+    and without needing anchors on the board."""
+    total, crosstotal, word_mult = 0, 0, 1
+    starti, startj = pos
+    di, dj = direction
+    other_direction = DOWN if direction == ACROSS else ACROSS
+    for (n, L) in enumerate(word):
+        i, j = starti + n*di, startj + n*dj
+        if is_letter(board[j][i]):
+            total += POINTS[L]
+            continue
+        b = BONUS[j][i]
+        mult = 3 if b == TW else 2 if b in (DW,'*') else 1
+        letter = POINTS[L] * (3 if b == TL else 2 if b == DL else 1)
+        word_mult *= mult
+        total += letter
+        (_, w) = find_word(board, i, j, other_direction)
+        if len(w) > 1:
+            crosstotal += mult * (letter + sum(POINTS[c] for c in w if c != '.'))
+    return crosstotal + word_mult * total
+
+#------------------------------------------------------------------------------
+# 5: a board that keeps its anchors
+
+# gaddag_plays() still finds every anchor, and its cross word, on every
+# call; but a play only changes a few squares. a Board keeps the anchors
+# and their cross-checks, and after a play updates only the squares whose
+# anchor or cross word can have changed: the squares played, and the empty
+# squares at either end of the words they are in, across and down.
+
+class Board(object):
+    """A board (rows of squares, as a_board()), with its anchors and their
+    cross-checks, in each direction, kept up to date by make_play()."""
+    def __init__(self, squares):
+        self.squares = [list(row) for row in squares]
+        self.checks = {ACROSS: {}, DOWN: {}} # {(i, j): anchor} for the anchors
+        self.lines = {ACROSS: {}, DOWN: {}}  # {j or i: row for gaddag_row_plays()}
+        self.update([(i, j) for j in range(1, len(self.squares)-1)
+                     for i in range(1, len(self.squares[0])-1)])
+
+    def update(self, squares):
+        "Recompute the anchors and cross-checks of squares."
+        board = self.squares
+        for (i, j) in squares:
+            anchored = is_empty(board[j][i]) and is_anchor(board, i, j)
+            for direction in (ACROSS, DOWN):
+                if anchored:
+                    other = DOWN if direction == ACROSS else ACROSS
+                    (_, w) = find_word(board, i, j, other)
+                    self.checks[direction][(i, j)] = cross_check(w) if len(w) > 1 else ANY
+                else:
+                    self.checks[direction].pop((i, j), None)
+            self.lines[ACROSS].pop(j, None)
+            self.lines[DOWN].pop(i, None)
+
+    def line_squares(self, k, direction):
+        "The (i, j) squares of row k (for ACROSS) or column k (for DOWN)."
+        if direction == ACROSS:
+            return [(i, k) for i in range(len(self.squares[0]))]
+        return [(k, j) for j in range(len(self.squares))]
+
+    def line(self, k, direction=ACROSS):
+        "Row (or column) k, like anchored_line(), from the cross-checks."
+        lines, checks = self.lines[direction], self.checks[direction]
+        if k not in lines:
+            line = []
+            for (i, j) in self.line_squares(k, direction):
+                sq = self.squares[j][i]
+                line.append(checks[(i, j)] if (i, j) in checks else
+                            '.' if is_empty(sq) else sq)
+            lines[k] = line
+        return lines[k]
+
+    def row_plays(self, hand, k, direction=ACROSS):
+        "The set of (start, word) plays in row (or column) k."
+        return gaddag_row_plays(hand, self.line(k, direction))
+
+    def horizontal_plays(self, hand, direction=ACROSS):
+        "The set of (score, pos, word) plays in direction, across all rows."
+        results = set()
+        size = len(self.squares) if direction == ACROSS else len(self.squares[0])
+        for k in range(1, size-1):
+            squares = self.line_squares(k, direction)
+            for (n, word) in self.row_plays(hand, k, direction):
+                pos = squares[n]
+                results.add((score_play(self.squares, pos, direction, word), pos, word))
+        return results
+
+    def all_plays(self, hand):
+        "The set of (score, pos, dir, word) plays, like all_plays()."
+        return set((score, pos, direction, word)
+                   for direction in (ACROSS, DOWN)
+                   for (score, pos, word) in self.horizontal_plays(hand, direction))
+
+    def best_play(self, hand):
+        plays = self.all_plays(hand)
+        return max(plays) if plays else NOPLAY
+
+    def make_play(self, play):
+        "Put the word down, and update the squares it changes."
+        (score, (i, j), (di, dj), word) = play
+        played = [(i + n*di, j + n*dj) for n in range(len(word))
+                  if not is_letter(self.squares[j + n*dj][i + n*di])]
+        make_play(play, self.squares)
+        changed = set(played)
+        for (i, j) in played:
+            for (di, dj) in (ACROSS, DOWN):
+                ((i2, j2), w) = find_word(self.squares, i, j, (di, dj))
+                changed.add((i2 - di, j2 - dj))
+                changed.add((i2 + len(w)*di, j2 + len(w)*dj))
+        self.update(changed)
+        return self
+
 #------------------------------------------------------------------------------
 # test
 
@@ -318,3 +587,45 @@ def test():
     assert ok('__CEHKN', 61, (9, 1), (1, 0), 'KiCk')
 
 test()
+
+def test_gaddag():
+    # the same plays as all_plays(); but vertical plays are scored without
+    # transposing, so with the bonus squares of the board, not its mirror
+    board = a_board()
+    for hand in ['ABCEHKN', 'SSSS', 'EEIRSTT']:
+        plays = gaddag_plays(hand, board)
+        old = all_plays(hand, a_board())
+        assert {p for p in plays if p[2] == ACROSS} == {p for p in old if p[2] == ACROSS}
+        assert {p[1:] for p in plays} == {p[1:] for p in old}
+    # all_plays() can use a blank twice; this can't
+    plays = gaddag_plays('_BCEHKN', board)
+    assert all(sum(L.islower() for L in p[-1]) <= 1 for p in plays)
+    assert (62, (3, 2), ACROSS, 'BaCKBENCH') in plays
+    assert find_word(board, 2, 3, ACROSS) == ((1, 3), 'GUY')
+    assert find_word(board, 4, 3, ACROSS) == ((1, 3), 'GUY.')
+    assert find_word(board, 8, 1, DOWN) == ((8, 1), '.EF')
+    assert find_word(board, 5, 1, DOWN) == ((5, 1), '.')
+    assert cross_check('GUY.') == set()
+    assert cross_check('.EF') == set('KR')
+    return 'tests pass'
+
+test_gaddag()
+
+def test_board():
+    board = Board(a_board())
+    for hand in ['ABCEHKN', 'EE_RSTT', 'AEIOSTR', '_BCEHKN', 'SSTTEEI']:
+        assert board.all_plays(hand) == gaddag_plays(hand, board.squares)
+        play = board.best_play(hand)
+        board.make_play(play)
+        # the same anchors and cross-checks as a board built from scratch
+        fresh = Board(board.squares)
+        assert board.checks == fresh.checks
+        assert all(board.line(k, d) == fresh.line(k, d)
+                   for d in (ACROSS, DOWN) for k in fresh.lines[d])
+    # a blank on the board is a letter that scores nothing
+    board = Board(a_board()).make_play((0, (3, 2), ACROSS, 'BaCKBENCH'))
+    assert is_letter(board.squares[2][4]) and (4, 1) in board.checks[ACROSS]
+    assert score_play(board.squares, (4, 1), DOWN, 'Ta') == 3 # T, on a triple word
+    return 'tests pass'
+
+test_board()
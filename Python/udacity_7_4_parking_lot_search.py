@@ -103,28 +103,8 @@ initial state for the problem above in this format:
 #------------------------------------------------------------------------------
 # solve
 
-def shortest_path_search(start, successors, is_goal):
-    """
-    Find the shortest path from start state to a state
-    such that is_goal(state) is true.
-    """
-    Fail = []
-    if is_goal(start):
-        return [start]
-    explored = set() # set of states we have visited
-    frontier = [ [start] ] # ordered list of paths we have blazed
-    while frontier:
-        path = frontier.pop(0)
-        s = path[-1]
-        for (state, action) in successors(s).items():
-            if state not in explored:
-                explored.add(state)
-                path2 = path + [action, state]
-                if is_goal(state):
-                    return path2
-                else:
-                    frontier.append(path2)
-    return Fail
+# the search core keeps parent pointers and rebuilds the path at the goal
+from udacity_4_search import shortest_path_search, astar_search
 
 def path_actions(path):
     """
@@ -134,14 +114,15 @@ def path_actions(path):
 
 N = 8
 
-def solve_parking_puzzle(start, N=N):
+def solve_parking_puzzle(start, N=N, stats=None):
     """
     Solve the puzzle described by the starting position (a tuple 
     of (object, locations) pairs).  Return a path of [state, action, ...]
     alternating items; an action is a pair (object, distance_moved),
     such as ('B', 16) to move 'B' two squares down on the N=8 grid.
+    If stats is a SearchStats, record what the search did in it.
     """
-    return shortest_path_search(grid(start, N), psuccessors, is_goal)
+    return shortest_path_search(grid(start, N), psuccessors, is_goal, stats=stats)
 
 def is_goal(state):
     """
@@ -281,3 +262,207 @@ def same_state(state1, state2):
     "Two states are the same if all corresponding sets of locs are the same."
     d1, d2 = dict(state1), dict(state2)
     return all(set(d1[key]) == set(d2[key]) for key in set(d1) | set(d2))
+
+#------------------------------------------------------------------------------
+# A*: explore states in order of moves so far + a lower bound on moves to go,
+# so that on big lots we don't expand every state within the solution depth
+# (astar_search is in udacity_4_search.py)
+
+from functools import partial
+
+# every car between '*' and the goal has to move at least once, and so does '*'
+def blocking_heuristic(state, N=N):
+    """
+    A lower bound on the number of moves left: 0 at the goal, else 1 plus the
+    number of cars in the way of the '*' car, along its line, to a goal square,
+    on an NxN grid.
+    """
+    state_dict = dict(state)
+    car, goals = state_dict["*"], state_dict["@"]
+    if set(car) & set(goals):
+        return 0
+    owner = {loc: c for (c, locs) in state for loc in locs if c not in "*@|"}
+    incr = car[1] - car[0]
+    best = None
+    for g in goals:
+        if (g // N == car[0] // N) if incr == 1 else (g % N == car[0] % N):
+            if g > max(car):
+                between = range(max(car)+incr, g, incr)
+            else:
+                between = range(g+incr, min(car), incr)
+            h = 1 + len({owner[loc] for loc in between if loc in owner})
+            best = h if best is None else min(best, h)
+    return 1 if best is None else best
+
+def solve_parking_puzzle2(start, N=N, stats=None):
+    """
+    Like solve_parking_puzzle, but with A* search, counting one per move.
+    Return a path of [state, action, ...] alternating items.
+    """
+    path = astar_search(grid(start, N), psuccessors, is_goal, 
+                        lambda action: 1, partial(blocking_heuristic, N=N), stats)
+    return [x if i % 2 == 0 else x[0] for (i, x) in enumerate(path)]
+
+def test_astar():
+    assert blocking_heuristic(puzzle1) == 3  # '*', 'B' and 'Y'
+    assert blocking_heuristic(puzzle3) == 2  # '*' and 'B'
+    for (puzzle, length) in [(puzzle1, 4), (puzzle2, 7), (puzzle3, 7), (puzzle4, 8)]:
+        path = solve_parking_puzzle2(puzzle)
+        assert len(path_actions(path)) == length
+        assert same_state(path[0], puzzle) and is_goal(path[-1])
+        assert all(legal_step(path[i:i+3]) for i in range(0, len(path)-2, 2))
+    # on a 6x6 grid the goal is 17, in row 2: the rows are 6 squares wide
+    small = (('*', locs(13, 2)), ('B', locs(10, 2, 6)))
+    assert blocking_heuristic(grid(small, 6), 6) == 2  # '*' and 'B'
+    assert len(solve_parking_puzzle2(small, 6)) == len(solve_parking_puzzle(small, 6)) == 5
+    return 'test_astar passes'
+
+test_astar()
+
+#------------------------------------------------------------------------------
+# compact states: only the first (lowest) location of each car changes, so a
+# state can be packed into one int, with a fixed number of bits per car.
+# squares are bits of an int too (a bitboard): bit loc is set if loc is
+# occupied, so checking a square is a shift and an and, and the explored set
+# holds ints instead of nested tuples
+
+def bitmask(locs):
+    "An int with the bits at each of locs set."
+    return sum(1 << loc for loc in set(locs))
+
+class ParkingBitboard(object):
+    """
+    Integer encoding of the states of one parking puzzle: car k's lowest
+    location is stored in bits [k*bits, (k+1)*bits) of the code.
+    """
+    def __init__(self, state, N=N):
+        self.N = N
+        self.base = dict(state)
+        self.cars = sorted(c for c in self.base if c not in "|@")
+        self.bits = (N*N - 1).bit_length()
+        self.mask = (1 << self.bits) - 1
+        self.walls = bitmask(self.base["|"])
+        self.goal = bitmask(self.base["@"])
+        carlocs = [sorted(self.base[c]) for c in self.cars]
+        self.size = [len(locs) for locs in carlocs]
+        self.incr = [locs[1] - locs[0] for locs in carlocs]
+        self.span = [locs[-1] - locs[0] for locs in carlocs]
+        self.shape = [bitmask(loc - locs[0] for loc in locs) for locs in carlocs]
+        self.star = self.cars.index("*")
+        self.start = self.encode(state)
+
+    def encode(self, state):
+        "Pack a tuple of (object, locations) pairs into an int."
+        state_dict = dict(state)
+        return sum(min(state_dict[c]) << (self.bits*k) for (k, c) in enumerate(self.cars))
+
+    def decode(self, code):
+        "Unpack an int into a sorted tuple of (object, locations) pairs."
+        state_dict = dict(self.base)
+        for (k, pos) in enumerate(self.positions(code)):
+            state_dict[self.cars[k]] = locs(pos, self.size[k], self.incr[k])
+        return tuple(sorted(state_dict.items()))
+
+    def positions(self, code):
+        "The lowest location of each car."
+        return [(code >> (self.bits*k)) & self.mask for k in range(len(self.cars))]
+
+    def is_goal(self, code):
+        pos = self.positions(code)[self.star]
+        return bool((self.shape[self.star] << pos) & self.goal)
+
+    def successors(self, code):
+        """
+        Like psuccessors, but on codes: a car can move along its line
+        until it bumps into another car or a wall.
+        """
+        results = {}
+        positions = self.positions(code)
+        occupied = self.walls
+        for (k, pos) in enumerate(positions):
+            occupied |= self.shape[k] << pos
+        for (k, pos) in enumerate(positions):
+            incr, shift = self.incr[k], self.bits*k
+            for (by, start) in [(-incr, pos), (incr, pos + self.span[k])]:
+                for i in range(1, self.N-2):
+                    loc_try = start + by*i
+                    if loc_try < 0 or (occupied >> loc_try) & 1:
+                        break
+                    results[code + ((by*i) << shift)] = (self.cars[k], by*i)
+        return results
+
+def solve_parking_puzzle3(start, N=N, stats=None):
+    """
+    Like solve_parking_puzzle, but searching over int-encoded states.
+    Return a path of [state, action, ...] alternating items.
+    """
+    board = ParkingBitboard(grid(start, N), N)
+    path = shortest_path_search(board.start, board.successors, board.is_goal, 
+                                stats=stats)
+    return [board.decode(x) if i % 2 == 0 else x for (i, x) in enumerate(path)]
+
+def test_bitboard():
+    board = ParkingBitboard(puzzle1)
+    assert board.cars == ['*', 'A', 'B', 'G', 'O', 'P', 'Y'] and board.bits == 6
+    assert same_state(board.decode(board.start), puzzle1)
+    assert board.encode(board.decode(board.start)) == board.start
+    state = board.decode(board.start)
+    assert {board.decode(c): a for (c, a) in board.successors(board.start).items()
+            } == psuccessors(state)
+    assert not board.is_goal(board.start)
+    for (puzzle, length) in [(puzzle1, 4), (puzzle2, 7), (puzzle3, 7), (puzzle4, 8)]:
+        path = solve_parking_puzzle3(puzzle)
+        assert len(path_actions(path)) == length
+        assert same_state(path[0], puzzle) and is_goal(path[-1])
+        assert all(legal_step(path[i:i+3]) for i in range(0, len(path)-2, 2))
+    return 'test_bitboard passes'
+
+test_bitboard()
+
+#------------------------------------------------------------------------------
+# parallel: expand each layer of the search across a pool of processes.
+# psuccessors and ParkingBitboard.successors can both be pickled.
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from udacity_4_search import parallel_shortest_path_search
+
+def test_parallel(executor):
+    for puzzle in (puzzle1, puzzle4):
+        start = grid(puzzle, N)
+        assert parallel_shortest_path_search(
+            start, psuccessors, is_goal, 2, executor, min_layer=16) == (
+            solve_parking_puzzle(puzzle))
+        board = ParkingBitboard(start, N)
+        assert parallel_shortest_path_search(
+            board.start, board.successors, board.is_goal, 2, executor, min_layer=16) == (
+            shortest_path_search(board.start, board.successors, board.is_goal))
+    return 'test_parallel passes'
+
+# threads at import, processes as a script: see udacity_4_search.py
+with ThreadPoolExecutor(2) as executor:
+    test_parallel(executor)
+
+if __name__ == '__main__':
+    with ProcessPoolExecutor(2) as executor:
+        test_parallel(executor)
+
+#------------------------------------------------------------------------------
+# instrumentation: how much work does each solver do?
+
+from udacity_4_search import SearchStats, instrument_search
+
+def test_stats():
+    bfs, astar = SearchStats(), SearchStats()
+    assert solve_parking_puzzle(puzzle4, stats=bfs) == solve_parking_puzzle(puzzle4)
+    solve_parking_puzzle2(puzzle4, stats=astar)
+    # the heuristic pays for itself: fewer states expanded
+    assert 0 < astar.expanded < bfs.expanded
+    # the counts for puzzle4: states on the frontier at the end are reached, not expanded
+    assert (bfs.expanded, bfs.generated, bfs.reached) == (983, 10898, 1060)
+    assert (astar.expanded, astar.generated, astar.reached) == (782, 8688, 1008)
+    return 'test_stats passes'
+
+test_stats()
+
+# for solver in (solve_parking_puzzle, solve_parking_puzzle2, solve_parking_puzzle3):
+#     instrument_search(solver, puzzle4)
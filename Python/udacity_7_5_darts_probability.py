@@ -196,7 +196,141 @@ no guarantee that the game will end in a finite number of moves.
 
 # def best_target(miss):
 #     "Return the target that maximizes the expected score."
-    
+
+#------------------------------------------------------------------------------
+# outcomes as a matrix:
+# number the 62 targets, plus 'OFF' the board as a 63rd possible hit, and
+# the outcome model for one miss rate is a 62 x 63 matrix of probabilities,
+# M[target, hit]. the expected score of every target is then one matrix
+# product, M @ scores, and a sweep over many miss rates is a stack of
+# matrices: built with numpy operations over all the miss rates at once.
+
+import numpy as np
+from functools import lru_cache
+
+sections = [int(s) for s in "20 1 18 4 13 6 10 15 2 17 3 19 7 16 8 11 14 9 12 5".split()]
+targets = ["%s%d" % (ring, s) for ring in "SDT" for s in range(1, 21)] + ["SB", "DB"]
+hits = targets + ["OFF"]
+index = {name: i for (i, name) in enumerate(hits)}
+scores = np.array([points.get(name, 0) for name in hits])
+
+def neighbors(section):
+    """
+    The sections one step counter-clockwise and clockwise of section.
+    """
+    i = sections.index(section)
+    return sections[i-1], sections[(i+1) % len(sections)]
+
+def outcome_matrices(misses):
+    """
+    The outcome matrix, M[target, hit], for each miss rate in misses,
+    as an array indexed by [miss, target, hit].
+    """
+    m = np.asarray(misses, dtype=float)
+    M = np.zeros((len(m), len(targets), len(hits)))
+    single_ring = [index["S%d" % s] for s in sections]
+    for (t, target) in enumerate(targets):
+        ring, section = target[0], target[1:]
+        if section == "B":
+            # ring misses land in the single ring, anywhere; so do section
+            # misses that hit a bull
+            if ring == "S":
+                bull = {"SB": 1 - m, "DB": m/4}
+                stray = 3*m/4
+            else:
+                md = np.minimum(3*m, 1) # the double bull is tiny
+                bull = {"DB": 1 - md, "SB": md/3}
+                stray = 2*md/3
+            for (name, p) in bull.items():
+                M[:, t, index[name]] += p * (1 - m)
+                stray = stray + p * m
+            M[:, t, single_ring] += (stray / 20.)[:, None]
+            continue
+        if ring == "T":
+            rings = {"T": 1 - m, "S": m}
+        elif ring == "D":
+            rings = {"D": 1 - m, "S": m/2}
+            M[:, t, index["OFF"]] += m/2
+        else:
+            rings = {"S": 1 - m/5, "D": m/10, "T": m/10}
+        section = int(section)
+        left, right = neighbors(section)
+        for (r, pr) in rings.items():
+            for (s, ps) in [(section, 1 - m), (left, m/2), (right, m/2)]:
+                M[:, t, index["%s%d" % (r, s)]] += pr * ps
+    return M
+
+@lru_cache(maxsize=1024)
+def outcome_matrix(miss):
+    return outcome_matrices([miss])[0]
+
+def outcome(target, miss):
+    "Return a probability distribution of {target: probability} pairs."
+    row = outcome_matrix(miss)[index[target]]
+    return {hits[h]: row[h] for h in np.flatnonzero(row)}
+
+def best_target(miss):
+    "Return the target that maximizes the expected score."
+    return targets[np.argmax(outcome_matrix(miss) @ scores)]
+
+def best_targets(misses):
+    """
+    The best target for each miss rate in misses, with one stack of
+    matrix products.
+    """
+    expected = outcome_matrices(misses) @ scores
+    return [targets[t] for t in expected.argmax(axis=1)]
+
+@lru_cache(maxsize=None)
+def best_target_grid(n=1000):
+    """
+    The best target for the miss rates 0, 1/n, 2/n, ... 1.
+    """
+    return best_targets(np.linspace(0, 1, n + 1))
+
+#------------------------------------------------------------------------------
+# the ambitious part: the fewest turns, as an MDP (udacity_5_mdp.py).
+# a state is (total left, darts left in the turn, total at the start of the
+# turn). a dart that leaves 0 on a double wins; one that leaves less than 0,
+# 1, or 0 without a double is a bust, and the total goes back to what it
+# was at the start of the turn, for the next turn. every turn costs 1, so
+# the utility of a state is minus the expected number of turns left.
+# a bust can repeat forever, so the game has cycles: value_iteration.
+
+from udacity_5_mdp import MDP, reachable, value_iteration
+
+def darts_mdp(miss):
+    "The game of double-out darts to 0, for a player with miss rate miss."
+    outcomes = {target: [(p, hit, points.get(hit, 0)) for (hit, p) in outcome(target, miss).items()]
+                for target in targets}
+    def transitions(state, target):
+        total, darts, start = state
+        result = []
+        for (p, hit, score) in outcomes[target]:
+            left = total - score
+            if left == 0 and hit[0] == "D":
+                result.append((p, (0, 0, 0)))
+            elif left < 2:
+                result.append((p, (start, 3, start)))
+            elif darts == 1:
+                result.append((p, (left, 3, left)))
+            else:
+                result.append((p, (left, darts - 1, start)))
+        return result
+    return MDP(actions=lambda state: targets, transitions=transitions,
+               terminal=lambda state: 0 if state[0] == 0 else None,
+               reward=lambda state, target, next_state: -1 if state[1] == 3 else 0)
+
+def play_darts(total, miss, epsilon=1e-6):
+    """
+    Return (policy, turns): the target to aim at in each state, from total
+    with 3 darts, and the expected number of turns it takes to finish.
+    """
+    mdp = darts_mdp(miss)
+    start = (total, 3, total)
+    U, _ = value_iteration(mdp, reachable(mdp, start), epsilon)
+    return (lambda state: mdp.best_action(state, U)), -U(start)
+
 #------------------------------------------------------------------------------
 # test
 
@@ -208,30 +342,45 @@ def test_darts():
 
 test_darts()
 
-# ******************************skipped******************************
-# def same_outcome(dict1, dict2):
-#     "Two states are the same if all corresponding sets of locs are the same."
-#     return all(abs(dict1.get(key, 0) - dict2.get(key, 0)) <= 0.0001
-#                for key in set(dict1) | set(dict2))
-
-# def test_darts2():
-#     assert best_target(0.0) == 'T20'
-#     assert best_target(0.1) == 'T20'
-#     assert best_target(0.4) == 'T19'
-#     assert same_outcome(outcome('T20', 0.0), {'T20': 1.0})
-#     assert same_outcome(outcome('T20', 0.1), 
-#                         {'T20': 0.81, 'S1': 0.005, 'T5': 0.045, 
-#                          'S5': 0.005, 'T1': 0.045, 'S20': 0.09})
-#     assert same_outcome(
-#             outcome('SB', 0.2),
-#             {'S9': 0.016, 'S8': 0.016, 'S3': 0.016, 'S2': 0.016, 'S1': 0.016,
-#              'DB': 0.04, 'S6': 0.016, 'S5': 0.016, 'S4': 0.016, 'S20': 0.016,
-#              'S19': 0.016, 'S18': 0.016, 'S13': 0.016, 'S12': 0.016,
-#              'S11': 0.016, 'S10': 0.016, 'S17': 0.016, 'S16': 0.016, 'S15':
-#              0.016, 'S14': 0.016, 'S7': 0.016, 'SB': 0.64})
-#     assert same_outcome(outcome('T20', 0.3),
-#                         {'S1': 0.045, 'T5': 0.105, 'S5': 0.045,
-#                          'T1': 0.105, 'S20': 0.21, 'T20': 0.49})
-#     assert best_target(0.6) == 'T7'
-
-# test_darts2()
+def same_outcome(dict1, dict2):
+    "Two states are the same if all corresponding sets of locs are the same."
+    return all(abs(dict1.get(key, 0) - dict2.get(key, 0)) <= 0.0001
+               for key in set(dict1) | set(dict2))
+
+def test_darts2():
+    assert best_target(0.0) == 'T20'
+    assert best_target(0.1) == 'T20'
+    assert best_target(0.4) == 'T19'
+    assert same_outcome(outcome('T20', 0.0), {'T20': 1.0})
+    assert same_outcome(outcome('T20', 0.1), 
+                        {'T20': 0.81, 'S1': 0.005, 'T5': 0.045, 
+                         'S5': 0.005, 'T1': 0.045, 'S20': 0.09})
+    assert same_outcome(
+            outcome('SB', 0.2),
+            {'S9': 0.016, 'S8': 0.016, 'S3': 0.016, 'S2': 0.016, 'S1': 0.016,
+             'DB': 0.04, 'S6': 0.016, 'S5': 0.016, 'S4': 0.016, 'S20': 0.016,
+             'S19': 0.016, 'S18': 0.016, 'S13': 0.016, 'S12': 0.016,
+             'S11': 0.016, 'S10': 0.016, 'S17': 0.016, 'S16': 0.016, 'S15':
+             0.016, 'S14': 0.016, 'S7': 0.016, 'SB': 0.64})
+    assert same_outcome(outcome('T20', 0.3),
+                        {'S1': 0.045, 'T5': 0.105, 'S5': 0.045,
+                         'T1': 0.105, 'S20': 0.21, 'T20': 0.49})
+    assert best_target(0.6) == 'T7'
+    # every row of every matrix is a probability distribution
+    M = outcome_matrices(np.linspace(0, 1, 101))
+    assert M.shape == (101, 62, 63) and (M >= 0).all()
+    assert np.allclose(M.sum(axis=2), 1)
+    assert best_targets([0.0, 0.1, 0.4, 0.6]) == ['T20', 'T20', 'T19', 'T7']
+    assert best_target_grid()[400] == 'T19'
+
+def test_play_darts():
+    policy, turns = play_darts(8, 0.0)
+    assert abs(turns - 1) < 1e-9
+    policy, turns = play_darts(8, 0.1)
+    assert policy((8, 3, 8)) == 'D4' and policy((2, 1, 8)) == 'D1'
+    # a bust can take any number of turns, and more misses take more
+    assert 1 < turns < play_darts(8, 0.3)[1]
+
+test_play_darts()
+
+test_darts2()